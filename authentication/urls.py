@@ -1,8 +1,7 @@
 from django.urls import path
-from .views import TokenObtainPairView_
-from rest_framework_simplejwt.views import TokenRefreshView
+from .views import TokenObtainPairView_, TokenRefreshView_
 
 urlpatterns = [
     path("token/", TokenObtainPairView_.as_view(), name="token_obtain_pair"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/refresh/", TokenRefreshView_.as_view(), name="token_refresh"),
 ]
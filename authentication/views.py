@@ -1,7 +1,18 @@
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from schedule_app.throttling import (
+    LoginRateThrottle,
+    LoginUserRateThrottle,
+    RefreshRateThrottle,
+    RefreshUserRateThrottle,
+)
 from .serializers import TokenObtainPairSerializer_
 
 
 # Create your views here.
 class TokenObtainPairView_(TokenObtainPairView):
     serializer_class = TokenObtainPairSerializer_
+    throttle_classes = (LoginRateThrottle, LoginUserRateThrottle)
+
+
+class TokenRefreshView_(TokenRefreshView):
+    throttle_classes = (RefreshRateThrottle, RefreshUserRateThrottle)
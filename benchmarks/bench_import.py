@@ -0,0 +1,234 @@
+"""Benchmarks ScheduleParser and the schedule import against SQLite.
+
+For every workbook size it measures the parse time, the peak memory allocated while
+parsing (tracemalloc) and the time needed to write the parsed schedules to the database.
+Results can be saved as a baseline and later runs are compared against it; the script
+exits with status 1 when a metric regresses by more than the allowed threshold.
+
+With --threads the import throughput of several workbooks (different months) imported
+at once is reported as well, for 1 up to the given number of threads. It is informative
+only, SQLite serializes writers, run it against MySQL to see the imports scale.
+
+Usage:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --sizes 10 100 --save-baseline
+    python -m benchmarks.bench_import --sizes 100 --threads 4
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+from ._django import setup_django
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+
+from schedule_manager.importer import import_employees  # noqa: E402
+from schedule_manager.models import EmployeeSchedule  # noqa: E402
+from schedule_manager.schedule_parser import ScheduleParser  # noqa: E402
+
+from .workbooks import generate_workbook  # noqa: E402
+
+
+User = get_user_model()
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "import.json"
+
+# allowed ratio between the current result and the baseline, per metric
+DEFAULT_THRESHOLDS = {"parse_s": 1.25, "peak_mb": 1.10, "import_s": 1.25}
+
+
+def _parse(content: bytes) -> ScheduleParser:
+    schedule_parser = ScheduleParser()
+    schedule_parser.parse(BytesIO(content))
+
+    return schedule_parser
+
+
+def measure_parse(content: bytes, repeat: int) -> tuple[float, float]:
+    """Returns the median parse time in seconds and the peak traced memory in MB."""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _parse(content)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    _parse(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return statistics.median(timings), peak / 2**20
+
+
+def measure_import(content: bytes, names: list[tuple[str, str]]) -> float:
+    """Returns the time in seconds needed to import the workbook into an empty database."""
+
+    User.objects.bulk_create(
+        User(email=f"employee{index}@example.com", first_name=first_name, last_name=last_name)
+        for index, (first_name, last_name) in enumerate(names)
+    )
+    schedule_parser = _parse(content)
+
+    start = time.perf_counter()
+    import_employees(schedule_parser.full_schedule)
+    elapsed = time.perf_counter() - start
+
+    EmployeeSchedule.objects.all().delete()
+    User.objects.all().delete()
+
+    return elapsed
+
+
+def measure_concurrent_import(size: int, threads: int) -> float:
+    """Returns the shifts written per second when `threads` months are imported at once."""
+
+    workbooks = [generate_workbook(size, month=month + 1) for month in range(threads)]
+    User.objects.bulk_create(
+        User(email=f"employee{index}@example.com", first_name=first_name, last_name=last_name)
+        for index, (first_name, last_name) in enumerate(workbooks[0][1])
+    )
+    parsed = [_parse(content).full_schedule for content, _ in workbooks]
+    barrier = threading.Barrier(threads)
+
+    def import_month(employees):
+        barrier.wait()
+        try:
+            import_employees(employees)
+        finally:
+            connections.close_all()
+
+    workers = [threading.Thread(target=import_month, args=(employees,)) for employees in parsed]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    shifts = sum(len(employee.schedule.shifts) for employees in parsed for employee in employees)
+
+    EmployeeSchedule.objects.all().delete()
+    User.objects.all().delete()
+
+    return shifts / elapsed
+
+
+def run(sizes: list[int], repeat: int, with_db: bool) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+
+    for size in sizes:
+        content, names = generate_workbook(size)
+        parse_s, peak_mb = measure_parse(content, repeat)
+        results[str(size)] = {"parse_s": parse_s, "peak_mb": peak_mb}
+
+        if with_db:
+            results[str(size)]["import_s"] = measure_import(content, names)
+
+        print(
+            f"{size:>6} employees: "
+            + ", ".join(f"{key}={value:.4f}" for key, value in results[str(size)].items()),
+            flush=True,
+        )
+
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    thresholds: dict[str, float],
+) -> list[str]:
+    """Returns descriptions of the metrics that regressed past their threshold."""
+
+    regressions = []
+
+    for size, metrics in results.items():
+        for key, value in metrics.items():
+            reference = baseline.get(size, {}).get(key)
+            if not reference:
+                continue
+
+            ratio = value / reference
+            status = "REGRESSION" if ratio > thresholds[key] else "ok"
+            print(f"{size:>6} {key:<9} {reference:10.4f} -> {value:10.4f} ({ratio:5.2f}x) {status}")
+
+            if ratio > thresholds[key]:
+                regressions.append(f"{key} for {size} employees is {ratio:.2f}x the baseline")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="parse runs per size")
+    parser.add_argument("--no-db", action="store_true", help="skip the database import")
+    parser.add_argument("--threads", type=int, help="also measure concurrent imports")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        help="override the allowed slowdown ratio for every metric (e.g. 1.5)",
+    )
+    args = parser.parse_args()
+
+    with_db = not args.no_db
+    if with_db:
+        # a throwaway database, in memory for SQLite
+        old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+
+    try:
+        results = run(args.sizes, args.repeat, with_db)
+
+        if with_db and args.threads:
+            for threads in range(1, args.threads + 1):
+                rate = measure_concurrent_import(args.sizes[-1], threads)
+                print(f"{threads:>3} concurrent imports: {rate:10.0f} shifts/s", flush=True)
+    finally:
+        if with_db:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {"machine": platform.platform(), "python": platform.python_version(), **results},
+                indent=4,
+            )
+            + "\n"
+        )
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+        return 0
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if args.threshold:
+        thresholds = {key: args.threshold for key in thresholds}
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), thresholds)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Benchmarks payload size and render time of the schedule API response formats.
+
+Renders a month of shifts (what /api/schedule/ returns) and a bigger payload of twelve
+months with every available renderer and reports the render time and the size of the
+body, raw and compressed with gzip and brotli as CompressionMiddleware would.
+
+Usage:
+    python -m benchmarks.bench_payload
+"""
+
+import argparse
+import datetime
+import gzip
+import random
+import sys
+import timeit
+
+from ._django import setup_django
+
+setup_django()
+
+import brotli  # noqa: E402
+from django.conf import settings  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from schedule_app.renderers import (  # noqa: E402
+    ColumnarJSONRenderer,
+    MessagePackRenderer,
+    ORJSONRenderer,
+)
+from schedule_manager.models import Shift, ShiftDayType  # noqa: E402
+from schedule_manager.serializers import ShiftSerializer  # noqa: E402
+
+
+RENDERERS = {
+    "drf json": JSONRenderer(),
+    "orjson": ORJSONRenderer(),
+    "columnar": ColumnarJSONRenderer(),
+    "msgpack": MessagePackRenderer(),
+}
+
+
+def month_payload(year: int, month: int, first_id: int, rng: random.Random) -> list[dict]:
+    shifts = []
+    day = datetime.date(year, month, 1)
+
+    while day.month == month:
+        working = rng.random() < 0.7
+        start = rng.choice((6, 8, 10, 12, 14))
+        shifts.append(
+            Shift(
+                id=first_id + len(shifts),
+                date=day,
+                time_start=datetime.time(start) if working else None,
+                time_end=datetime.time(start + 8) if working else None,
+                day_type=ShiftDayType.WORK if working else ShiftDayType.NON_WORKING_DAY,
+            )
+        )
+        day += datetime.timedelta(days=1)
+
+    return ShiftSerializer(shifts, many=True).data
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="renders per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = {
+        "one month": month_payload(2025, 5, 1000, rng),
+        "twelve months": [
+            shift for month in range(1, 13) for shift in month_payload(2025, month, month * 100, rng)
+        ],
+    }
+
+    for name, payload in payloads.items():
+        print(f"\n{name} ({len(payload)} shifts)")
+        print(f"{'format':<10}{'render us':>11}{'raw B':>9}{'gzip B':>9}{'br B':>9}")
+
+        for format_name, renderer in RENDERERS.items():
+            body = renderer.render(payload)
+            seconds = timeit.timeit(lambda: renderer.render(payload), number=args.number)
+
+            print(
+                f"{format_name:<10}{seconds / args.number * 1e6:>11.1f}{len(body):>9}"
+                f"{len(gzip.compress(body, compresslevel=6, mtime=0)):>9}"
+                f"{len(brotli.compress(body, quality=settings.BROTLI_QUALITY)):>9}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Benchmarks worker startup time and memory.
+
+Every run starts a fresh interpreter that loads the ASGI application and the URLconf,
+the way a uvicorn worker does at boot, and reports the time it took, the peak RSS of
+the process and which heavy modules were imported along the way.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --with-parser
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from ._django import BASE_DIR
+
+
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl")
+
+WORKER_SCRIPT = """
+import json, resource, sys, time
+
+start = time.perf_counter()
+
+from schedule_app.asgi import application
+from django.urls import get_resolver
+
+get_resolver().url_patterns
+
+if {with_parser}:
+    from schedule_manager.schedule_parser import ScheduleParser
+    import pandas
+
+elapsed = time.perf_counter() - start
+
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": [name for name in {heavy_modules!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(with_parser: bool) -> dict:
+    env = {
+        "DJANGO_SETTINGS_MODULE": "schedule_app.settings",
+        "ADMIN_ENDPOINT": "admin",
+        "DJANGO_SECRET_KEY": "benchmark-secret-key-which-is-long-enough",
+        "PRODUCTION": "true",
+        "DB_ENGINE": "sqlite",
+        **os.environ,
+    }
+    script = WORKER_SCRIPT.format(with_parser=with_parser, heavy_modules=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=BASE_DIR, env=env, capture_output=True, check=True
+    ).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--with-parser",
+        action="store_true",
+        help="also import the parsing stack, to see what loading it eagerly costs",
+    )
+    args = parser.parse_args()
+
+    results = [measure(args.with_parser) for _ in range(args.runs)]
+
+    print(f"startup: {statistics.median(result['seconds'] for result in results):.3f}s (median)")
+    print(f"max RSS: {statistics.median(result['max_rss_mb'] for result in results):.1f} MB")
+    print(f"heavy modules loaded: {', '.join(results[0]['heavy_modules']) or 'none'}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Shows that throttled requests are rejected before any DB or password hash work.
+
+Sends bursts of requests to the login, token refresh and schedule endpoints in-process,
+with small throttle budgets, and reports for the accepted and the throttled (429)
+requests how long they took, how many DB queries they ran and how many password hashes
+they computed.
+
+Usage:
+    python -m benchmarks.bench_throttle
+    python -m benchmarks.bench_throttle --requests 50
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections import defaultdict
+from unittest import mock
+
+from ._django import setup_django
+
+setup_django(
+    THROTTLE_LOGIN_RATE="5/min",
+    THROTTLE_LOGIN_USER_RATE="5/min",
+    THROTTLE_REFRESH_RATE="5/min",
+    THROTTLE_REFRESH_USER_RATE="5/min",
+    THROTTLE_SCHEDULE_RATE="5/min",
+)
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.hashers import get_hasher  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+
+User = get_user_model()
+
+PASSWORD = "benchmark-password"
+
+
+def burst(send, count: int) -> dict[int, list[tuple[float, int, int]]]:
+    """Sends `count` requests and groups (seconds, queries, hashes) by response status."""
+
+    hasher = type(get_hasher())
+    results: dict[int, list[tuple[float, int, int]]] = defaultdict(list)
+
+    for _ in range(count):
+        with (
+            mock.patch.object(hasher, "encode", autospec=True, side_effect=hasher.encode) as hashes,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            start = time.perf_counter()
+            status = send().status_code
+            elapsed = time.perf_counter() - start
+
+        results[status].append((elapsed, len(queries), hashes.call_count))
+
+    return results
+
+
+def report(endpoint: str, results: dict[int, list[tuple[float, int, int]]]) -> None:
+    for status, samples in sorted(results.items()):
+        print(
+            f"{endpoint:<15}{status:>7}{len(samples):>10}"
+            f"{statistics.median(sample[0] for sample in samples) * 1000:>12.2f}"
+            f"{max(sample[1] for sample in samples):>13}"
+            f"{max(sample[2] for sample in samples):>12}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20, help="requests per endpoint")
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+
+    try:
+        User.objects.create_user(
+            "employee@example.com", PASSWORD, first_name="Jan", last_name="Kowalski"
+        )
+        client = Client()
+        tokens = client.post(
+            "/auth/token/",
+            {"email": "employee@example.com", "password": PASSWORD},
+            "application/json",
+        ).json()
+        cache.clear()
+
+        print(
+            f"{'endpoint':<15}{'status':>7}{'requests':>10}{'median ms':>12}"
+            f"{'max queries':>13}{'max hashes':>12}"
+        )
+
+        # wrong passwords, the case a misbehaving client retries
+        report(
+            "token",
+            burst(
+                lambda: client.post(
+                    "/auth/token/",
+                    {"email": "employee@example.com", "password": "wrong-password"},
+                    "application/json",
+                ),
+                args.requests,
+            ),
+        )
+        report(
+            "token_refresh",
+            burst(
+                lambda: client.post(
+                    "/auth/token/refresh/", {"refresh": tokens["refresh"]}, "application/json"
+                ),
+                args.requests,
+            ),
+        )
+        report(
+            "schedule",
+            burst(
+                lambda: client.get(
+                    "/api/schedule/?month=1&year=2025",
+                    HTTP_AUTHORIZATION=f"Bearer {tokens['access']}",
+                ),
+                args.requests,
+            ),
+        )
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+"""HTTP load test of the auth and schedule API served by uvicorn.
+
+Seeds users and their schedules into a fresh SQLite database, starts the application
+with uvicorn and simulates clients the way they behave after a schedule is published:
+every client logs in at (almost) the same moment, fetches the current and the next month
+(or calls the bootstrap endpoint with --bootstrap) and then keeps polling its schedule,
+refreshing the access token from time to time. Throughput and latency percentiles are
+reported per endpoint, together with the number of DB queries each endpoint runs.
+
+Usage:
+    python -m benchmarks.loadtest --clients 50 --duration 30
+    python -m benchmarks.loadtest --workers 4 --json results.json
+    python -m benchmarks.loadtest --bootstrap
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ._django import BASE_DIR, setup_django
+
+
+PASSWORD = "load-test-password"
+
+THROTTLE_SCOPES = ("LOGIN", "LOGIN_USER", "REFRESH", "REFRESH_USER", "SCHEDULE")
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency: float
+
+
+@dataclass
+class Client:
+    """A simulated mobile client with its own keep-alive connection."""
+
+    host: str
+    port: int
+    email: str
+    samples: list[Sample] = field(default_factory=list)
+    access: str | None = None
+    refresh: str | None = None
+
+    def __post_init__(self) -> None:
+        self._connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(
+        self, endpoint: str, method: str, path: str, body: dict | None = None
+    ) -> tuple[int, dict | list | None]:
+        headers = {"Content-Type": "application/json"}
+        if self.access and not endpoint.startswith("token"):
+            headers["Authorization"] = f"Bearer {self.access}"
+
+        start = time.perf_counter()
+        try:
+            self._connection.request(
+                method, path, body=json.dumps(body) if body else None, headers=headers
+            )
+            response = self._connection.getresponse()
+            content = response.read()
+            status = response.status
+
+        except (OSError, http.client.HTTPException):
+            self._connection.close()
+            content, status = b"", 0
+
+        self.samples.append(Sample(endpoint, status, time.perf_counter() - start))
+
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+    def login(self) -> None:
+        status, data = self.request(
+            "token", "POST", "/auth/token/", {"email": self.email, "password": PASSWORD}
+        )
+        if status == 200 and isinstance(data, dict):
+            self.access, self.refresh = data["access"], data["refresh"]
+
+    def refresh_token(self) -> None:
+        status, data = self.request(
+            "token_refresh", "POST", "/auth/token/refresh/", {"refresh": self.refresh}
+        )
+        if status == 200 and isinstance(data, dict):
+            self.access = data["access"]
+            self.refresh = data.get("refresh", self.refresh)
+
+        else:
+            self.login()
+
+    def poll(self, month: int, year: int) -> None:
+        self.request("schedule", "GET", f"/api/schedule/?month={month}&year={year}")
+
+    def bootstrap(self) -> None:
+        self.request("bootstrap", "GET", "/api/bootstrap/")
+
+
+def seed(users: int, months: list[tuple[int, int]]) -> list[str]:
+    """Creates users with a full schedule for each of the given months.
+
+    Returns:
+        list[str]: Emails of the created users.
+    """
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    from schedule_manager.models import EmployeeSchedule, Shift, ShiftDayType
+
+    User = get_user_model()
+
+    # hashing is deliberately slow, so every user shares a single hash
+    password = make_password(PASSWORD)
+    created = User.objects.bulk_create(
+        User(
+            email=f"employee{index}@example.com",
+            first_name=f"Employee{index}",
+            last_name="Load",
+            password=password,
+        )
+        for index in range(users)
+    )
+
+    schedules = EmployeeSchedule.objects.bulk_create(
+        EmployeeSchedule(user=user, month=month, year=year)
+        for user in created
+        for month, year in months
+    )
+
+    shifts = []
+    for schedule in schedules:
+        day = datetime.date(schedule.year, schedule.month, 1)
+        while day.month == schedule.month:
+            working = day.weekday() < 5
+            shifts.append(
+                Shift(
+                    schedule=schedule,
+                    date=day,
+                    time_start=datetime.time(8) if working else None,
+                    time_end=datetime.time(16) if working else None,
+                    day_type=ShiftDayType.WORK if working else ShiftDayType.NON_WORKING_DAY,
+                )
+            )
+            day += datetime.timedelta(days=1)
+
+    Shift.objects.bulk_create(shifts, batch_size=5000)
+
+    return [user.email for user in created]
+
+
+def count_queries(email: str, month: int, year: int) -> dict[str, int]:
+    """Runs each endpoint once in-process and returns the number of DB queries it made."""
+
+    from django.db import connection
+    from django.test import Client as TestClient
+    from django.test.utils import CaptureQueriesContext
+
+    client = TestClient()
+    queries: dict[str, int] = {}
+
+    with CaptureQueriesContext(connection) as context:
+        tokens = client.post(
+            "/auth/token/", {"email": email, "password": PASSWORD}, "application/json"
+        ).json()
+    queries["token"] = len(context)
+
+    with CaptureQueriesContext(connection) as context:
+        refreshed = client.post(
+            "/auth/token/refresh/", {"refresh": tokens["refresh"]}, "application/json"
+        ).json()
+    queries["token_refresh"] = len(context)
+
+    with CaptureQueriesContext(connection) as context:
+        client.get(
+            f"/api/schedule/?month={month}&year={year}",
+            HTTP_AUTHORIZATION=f"Bearer {refreshed['access']}",
+        )
+    queries["schedule"] = len(context)
+
+    with CaptureQueriesContext(connection) as context:
+        client.get("/api/bootstrap/", HTTP_AUTHORIZATION=f"Bearer {refreshed['access']}")
+    queries["bootstrap"] = len(context)
+
+    return queries
+
+
+def start_server(port: int, workers: int, extra_args: list[str], env: dict[str, str]):
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "schedule_app.asgi:application",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--no-access-log",
+        *extra_args,
+    ]
+    server = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited before it started accepting connections")
+
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+
+        except OSError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 60 seconds")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_client(
+    client: Client,
+    barrier: threading.Barrier,
+    months: list[tuple[int, int]],
+    duration: float,
+    poll_interval: float,
+    refresh_every: int,
+    bootstrap: bool,
+) -> None:
+    rng = random.Random(client.email)
+
+    # everyone opens the app at once when the schedule is published
+    barrier.wait()
+    client.login()
+    deadline = time.monotonic() + duration
+
+    if bootstrap:
+        client.bootstrap()
+    else:
+        for month, year in months:
+            client.poll(month, year)
+
+    polls = 0
+    while time.monotonic() < deadline:
+        time.sleep(rng.uniform(0.5, 1.5) * poll_interval)
+
+        polls += 1
+        if polls % refresh_every == 0:
+            client.refresh_token()
+
+        client.poll(*rng.choice(months))
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def report(samples: list[Sample], elapsed: float, queries: dict[str, int]) -> dict:
+    by_endpoint: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+
+    summary = {}
+    print(
+        f"{'endpoint':<15}{'requests':>9}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'queries':>9}"
+    )
+
+    for endpoint, endpoint_samples in sorted(by_endpoint.items()):
+        latencies = [sample.latency * 1000 for sample in endpoint_samples]
+        errors = sum(1 for sample in endpoint_samples if sample.status >= 400 or not sample.status)
+        summary[endpoint] = {
+            "requests": len(endpoint_samples),
+            "errors": errors,
+            "throughput": len(endpoint_samples) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies),
+            "queries": queries.get(endpoint),
+        }
+        row = summary[endpoint]
+        print(
+            f"{endpoint:<15}{row['requests']:>9}{row['errors']:>8}{row['throughput']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            f"{row['max_ms']:>9.1f}{row['queries']!s:>9}"
+        )
+
+    print(f"total: {len(samples)} requests in {elapsed:.1f}s ({len(samples) / elapsed:.1f} req/s)")
+
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--users", type=int, help="seeded users (defaults to --clients)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of polling")
+    parser.add_argument("--poll-interval", type=float, default=2, help="seconds between polls")
+    parser.add_argument("--refresh-every", type=int, default=10, help="polls between refreshes")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument(
+        "--bootstrap", action="store_true", help="load both months with /api/bootstrap/ on login"
+    )
+    parser.add_argument("--port", type=int, help="port to serve on (random by default)")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument(
+        "--keep-throttles", action="store_true", help="don't lift the API rate limits"
+    )
+    parser.add_argument(
+        "uvicorn_args", nargs="*", help="extra uvicorn arguments, after a `--` separator"
+    )
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(prefix="loadtest-", suffix=".sqlite3", delete=False)
+    db_file.close()
+
+    env = {
+        **os.environ,
+        "DB_ENGINE": "sqlite",
+        "DB_NAME": db_file.name,
+        "ADMIN_ENDPOINT": os.environ.get("ADMIN_ENDPOINT", "admin"),
+        "DJANGO_SECRET_KEY": os.environ.get(
+            "DJANGO_SECRET_KEY", "load-test-secret-key-which-is-long-enough"
+        ),
+        "PRODUCTION": os.environ.get("PRODUCTION", "true"),
+    }
+    if not args.keep_throttles:
+        # every simulated client comes from the same IP
+        env.update({f"THROTTLE_{scope}_RATE": "1000000/s" for scope in THROTTLE_SCOPES})
+    os.environ.update(env)
+    setup_django()
+
+    from django.core.management import call_command
+
+    today = datetime.date.today()
+    next_month = (today.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+    months = [(today.month, today.year), (next_month.month, next_month.year)]
+
+    try:
+        call_command("migrate", verbosity=0)
+        emails = seed(args.users or args.clients, months)
+        queries = count_queries(emails[0], *months[0])
+
+        port = args.port or free_port()
+        server = start_server(port, args.workers, args.uvicorn_args, env)
+
+        try:
+            clients = [
+                Client("127.0.0.1", port, emails[index % len(emails)])
+                for index in range(args.clients)
+            ]
+            barrier = threading.Barrier(len(clients))
+
+            start = time.monotonic()
+            threads = [
+                threading.Thread(
+                    target=run_client,
+                    args=(
+                        client,
+                        barrier,
+                        months,
+                        args.duration,
+                        args.poll_interval,
+                        args.refresh_every,
+                        args.bootstrap,
+                    ),
+                )
+                for client in clients
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - start
+
+        finally:
+            server.terminate()
+            server.wait()
+
+    finally:
+        os.unlink(db_file.name)
+
+    summary = report([sample for client in clients for sample in client.samples], elapsed, queries)
+
+    if args.json:
+        args.json.write_text(
+            json.dumps(
+                {
+                    "clients": args.clients,
+                    "workers": args.workers,
+                    "bootstrap": args.bootstrap,
+                    "duration": elapsed,
+                    "endpoints": summary,
+                },
+                indent=4,
+            )
+            + "\n"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
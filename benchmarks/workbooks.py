@@ -0,0 +1,186 @@
+import calendar
+import datetime
+import random
+from io import BytesIO
+from itertools import product
+from typing import BinaryIO
+
+from openpyxl import Workbook
+
+
+SECTIONS: tuple[str, ...] = (
+    "FULL TIME",
+    "PART TIME 3/4",
+    "PART TIME 1/2",
+    "PART TIME 1/4",
+    "INSTRUKTORZY",
+)
+
+# share of employees placed in each section, in the same order as SECTIONS
+SECTION_WEIGHTS: tuple[float, ...] = (0.5, 0.2, 0.15, 0.1, 0.05)
+
+WEEKDAYS: tuple[str, ...] = ("pon", "wt", "śr", "czw", "pt", "sob", "nd")
+
+FIRST_NAMES: tuple[str, ...] = (
+    "Anna", "Piotr", "Maria", "Krzysztof", "Katarzyna", "Andrzej", "Małgorzata", "Tomasz",
+    "Agnieszka", "Paweł", "Barbara", "Michał", "Ewa", "Marcin", "Magdalena", "Jakub",
+    "Joanna", "Adam", "Aleksandra", "Łukasz", "Monika", "Kamil", "Natalia", "Mateusz",
+    "Karolina", "Bartosz", "Justyna", "Wojciech", "Zofia", "Dawid", "Julia", "Szymon",
+    "Alicja", "Filip", "Oliwia", "Hubert", "Weronika", "Igor", "Helena", "Jan",
+    "Lena", "Marek", "Hanna", "Patryk", "Maja", "Karol", "Nikola", "Oskar",
+    "Iga", "Robert",
+)  # fmt: skip
+
+LAST_NAME_STEMS: tuple[str, ...] = (
+    "Kowal", "Nowak", "Wiśniew", "Wójc", "Kamiń", "Lewandow", "Zieliń", "Szymań",
+    "Woźniak", "Dąbrow", "Kozłow", "Jankow", "Mazur", "Kwiatkow", "Krawczyk", "Piotrow",
+    "Grabow", "Pawłow", "Michal", "Król", "Wieczor", "Jabłoń", "Wróbel", "Majew",
+    "Olszew",
+)  # fmt: skip
+
+LAST_NAME_SUFFIXES: tuple[str, ...] = ("ski", "ska", "czyk", "owicz")
+
+# (cell, weight) pairs covering every cell form ScheduleParser understands
+CELL_CHOICES: tuple[tuple[str, int], ...] = (
+    ("8:00-16:00", 20),
+    ("10:00-18:00", 15),
+    ("12:00-20:00", 15),
+    ("14:00-22:00", 10),
+    ("6:00-14:00", 8),
+    ("10:00MC18:00", 4),
+    ("8:00U16:00", 3),
+    ("W", 20),
+    ("OFF", 5),
+)
+
+
+def employee_names(count: int) -> list[tuple[str, str]]:
+    """Returns a deterministic list of unique (first name, last name) pairs.
+
+    Args:
+        count (int): Number of names to generate.
+
+    Returns:
+        list[tuple[str, str]]: Unique name pairs, without spaces in either part.
+    """
+
+    last_names = [stem + suffix for stem, suffix in product(LAST_NAME_STEMS, LAST_NAME_SUFFIXES)]
+    names = [
+        (first_name, last_name) for last_name, first_name in product(last_names, FIRST_NAMES)
+    ]
+
+    if count > len(names):
+        raise ValueError(f"Can generate at most {len(names)} unique employee names")
+
+    return names[:count]
+
+
+def _split_into_sections(names: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+    """Distributes employees over the sheet sections according to SECTION_WEIGHTS."""
+
+    sections: list[list[tuple[str, str]]] = []
+    start = 0
+
+    for weight in SECTION_WEIGHTS[:-1]:
+        end = start + round(len(names) * weight)
+        sections.append(names[start:end])
+        start = end
+
+    sections.append(names[start:])
+
+    return sections
+
+
+def write_workbook(
+    file: str | BinaryIO,
+    employees: int | list[tuple[str, str]],
+    year: int = 2025,
+    month: int = 5,
+    seed: int = 0,
+) -> list[tuple[str, str]]:
+    """Writes a synthetic schedule workbook in the layout ScheduleParser expects.
+
+    The sheet consists of the month header (a date in the first cell), a row of weekday
+    names, a row with days of the month and the employees grouped into the sections of
+    `layouts.DEFAULT_LAYOUT`. Days from the previous month, which fill the first week up
+    to Monday, are left empty.
+
+    Args:
+        file (str | BinaryIO): Path or binary buffer the workbook is saved to.
+        employees (int | list[tuple[str, str]]): Number of employees to generate or an
+            explicit list of (first name, last name) pairs.
+        year (int, optional): Year of the schedule. Defaults to 2025.
+        month (int, optional): Month of the schedule. Defaults to 5.
+        seed (int, optional): Seed of the random cell contents. Defaults to 0.
+
+    Returns:
+        list[tuple[str, str]]: Names of the employees written to the sheet.
+    """
+
+    names = employee_names(employees) if isinstance(employees, int) else employees
+    rng = random.Random(seed)
+    cells, weights = zip(*CELL_CHOICES)
+
+    leading_days = datetime.date(year, month, 1).weekday()
+    days_in_month = calendar.monthrange(year, month)[1]
+    day_columns = leading_days + days_in_month
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+
+    sheet.append([datetime.datetime(year, month, 1)])
+    sheet.append(
+        ["Imię i nazwisko", None] + [WEEKDAYS[column % 7] for column in range(day_columns)]
+    )
+    sheet.append([None, "Etat"] + [None] * leading_days + list(range(1, days_in_month + 1)))
+
+    for section, section_names in zip(SECTIONS, _split_into_sections(names)):
+        sheet.append([section])
+
+        for first_name, last_name in section_names:
+            sheet.append(
+                [f"{first_name} {last_name}", section]
+                + [None] * leading_days
+                + rng.choices(cells, weights, k=days_in_month)
+            )
+
+    workbook.save(file)
+
+    return names
+
+
+def generate_workbook(
+    employees: int, year: int = 2025, month: int = 5, seed: int = 0
+) -> tuple[bytes, list[tuple[str, str]]]:
+    """Generates a synthetic schedule workbook in memory.
+
+    Args:
+        employees (int): Number of employees in the sheet.
+        year (int, optional): Year of the schedule. Defaults to 2025.
+        month (int, optional): Month of the schedule. Defaults to 5.
+        seed (int, optional): Seed of the random cell contents. Defaults to 0.
+
+    Returns:
+        tuple:
+            content (bytes): The .xlsx file content.
+            names (list[tuple[str, str]]): Names of the employees in the sheet.
+    """
+
+    buffer = BytesIO()
+    names = write_workbook(buffer, employees, year=year, month=month, seed=seed)
+
+    return buffer.getvalue(), names
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic schedule workbook.")
+    parser.add_argument("output", help="path of the .xlsx file to write")
+    parser.add_argument("-n", "--employees", type=int, default=100)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--month", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_workbook(args.output, args.employees, year=args.year, month=args.month, seed=args.seed)
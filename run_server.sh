@@ -2,12 +2,31 @@
 
 IS_PRODUCTION=$(echo "$PRODUCTION" | tr -d '\r' | xargs)
 
+# Waits for the database with backoff instead of a fixed sleep and migrates only when
+# something is pending. Set RUN_MIGRATIONS=false when migrations run as a separate
+# deploy step, so several containers starting at once don't all migrate.
+if [ "$(echo "${RUN_MIGRATIONS:-true}" | tr -d '\r' | xargs)" = "true" ]; then
+    python manage.py wait_for_db --timeout "${DB_WAIT_TIMEOUT:-60}" --migrate || exit 1
+else
+    python manage.py wait_for_db --timeout "${DB_WAIT_TIMEOUT:-60}" || exit 1
+fi
+
 if [ "$IS_PRODUCTION" = "true" ]; then
     echo "INFO: Running in production"
-    sleep 10 && python manage.py migrate && uvicorn schedule_app.asgi:application --host 0.0.0.0 --port 8000
+    # without REDIS_URL event push, throttling and replica pinning are kept per process,
+    # so several workers are only started by default with it (/admin/metrics/ is always
+    # per worker)
+    if [ -n "$(echo "$REDIS_URL" | tr -d '\r' | xargs)" ]; then
+        DEFAULT_WORKERS=$(nproc)
+    else
+        DEFAULT_WORKERS=1
+    fi
+
+    exec uvicorn schedule_app.asgi:application --host 0.0.0.0 --port 8000 \
+        --workers "${WEB_CONCURRENCY:-$DEFAULT_WORKERS}"
 
 else
     echo "WARN: PRODUCTION is set to false, make sure you're not running this in production"
-    sleep 10 && python manage.py migrate && uvicorn schedule_app.asgi:application --host 0.0.0.0 --port 8000 --reload
+    exec uvicorn schedule_app.asgi:application --host 0.0.0.0 --port 8000 --reload
 
-fi
\ No newline at end of file
+fi
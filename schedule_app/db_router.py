@@ -0,0 +1,98 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+# auth, sessions and the token blacklist always stay on the primary
+PRIMARY_APP_LABELS = frozenset(
+    {"admin", "auth", "authentication", "contenttypes", "sessions", "token_blacklist"}
+)
+
+PIN_CACHE_KEY = "db_router:primary_pinned_until"
+
+# set once the current request (or command) has written, so it reads its own writes
+_request_pinned: ContextVar[bool] = ContextVar("request_pinned", default=False)
+
+# last pin this process stored in the cache, to avoid re-setting it on every write
+_pinned_until_local = 0.0
+
+
+def pin_primary(seconds: float | None = None) -> None:
+    """Sends all reads to the primary for a while, in every worker.
+
+    Used after imports so nobody reads a replica that has not caught up yet.
+
+    Args:
+        seconds (float | None, optional): How long to pin reads for. Defaults to
+            settings.DATABASE_REPLICA_PIN_SECONDS.
+    """
+
+    global _pinned_until_local
+
+    if seconds is None:
+        seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+
+    now = time.time()
+    # refresh the pin only once half of it has passed, bulk writes call this a lot
+    if _pinned_until_local - now > seconds / 2:
+        return
+
+    _pinned_until_local = now + seconds
+    cache.set(PIN_CACHE_KEY, _pinned_until_local, seconds)
+
+
+def is_primary_pinned() -> bool:
+    return _request_pinned.get() or (cache.get(PIN_CACHE_KEY) or 0) > time.time()
+
+
+class PrimaryReplicaRouter:
+    """Routes reads of schedule data to the read replicas and everything else to the primary.
+
+    Reads go to the primary when there are no replicas configured, inside transactions,
+    once the current request has written anything and for DATABASE_REPLICA_PIN_SECONDS
+    after a write to schedule data.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+
+        if (
+            not replicas
+            or model._meta.app_label in PRIMARY_APP_LABELS
+            or connections["default"].in_atomic_block
+            or is_primary_pinned()
+        ):
+            return "default"
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if settings.DATABASE_REPLICAS:
+            _request_pinned.set(True)
+
+            if model._meta.app_label not in PRIMARY_APP_LABELS:
+                pin_primary()
+
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """Scopes the read-your-writes pin of PrimaryReplicaRouter to a single request."""
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_pinned.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_pinned.reset(token)
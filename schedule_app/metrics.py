@@ -0,0 +1,137 @@
+import threading
+from bisect import bisect_left
+
+
+class Histogram:
+    """A Prometheus-style histogram with fixed buckets and labels.
+
+    Observations only increment a bucket counter under a lock, so recording is cheap
+    enough to do on every request. Values are kept per process.
+
+    Attributes:
+        name (str): Metric name.
+        documentation (str): Help text of the metric.
+        labelnames (tuple[str, ...]): Names of the labels every observation must have.
+        buckets (tuple[float, ...]): Sorted upper bounds of the buckets.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+
+        # label values -> [count for every bucket and +Inf, sum of observed values]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Records a single observation.
+
+        Args:
+            value (float): Observed value.
+            **labels (str): Value of every label in `labelnames`.
+        """
+
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self) -> None:
+        """Removes all recorded observations."""
+
+        with self._lock:
+            self._series.clear()
+
+    def collect(self) -> list[str]:
+        """Returns the histogram in the Prometheus text exposition format.
+
+        Returns:
+            list[str]: Lines of the exposition, without trailing newlines.
+        """
+
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+
+        for key, (counts, total) in sorted(series.items()):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+
+            for bound, count in zip((*map(_format_bound, self.buckets), "+Inf"), counts):
+                cumulative += count
+                bucket_labels = ",".join([*labels, f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+
+            series_labels = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{series_labels} {total}")
+            lines.append(f"{self.name}_count{series_labels} {cumulative}")
+
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound: float) -> str:
+    return str(int(bound)) if float(bound).is_integer() else str(bound)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 1000)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+REQUEST_LABELS = ("view", "method", "status")
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Wall time spent handling a request.",
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+request_db_queries = Histogram(
+    "http_request_db_queries",
+    "Number of database queries executed while handling a request.",
+    REQUEST_LABELS,
+    QUERY_COUNT_BUCKETS,
+)
+request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries while handling a request.",
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+import_stage_duration = Histogram(
+    "schedule_import_stage_duration_seconds",
+    "Time spent in each stage of a schedule upload.",
+    ("stage",),
+    STAGE_BUCKETS,
+)
+
+REGISTRY: tuple[Histogram, ...] = (
+    request_duration,
+    request_db_queries,
+    request_db_duration,
+    import_stage_duration,
+)
+
+
+def render_metrics() -> str:
+    """Renders every registered metric in the Prometheus text exposition format."""
+
+    return "\n".join(line for histogram in REGISTRY for line in histogram.collect()) + "\n"
@@ -0,0 +1,164 @@
+import gzip
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+
+import brotli
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+
+logger = logging.getLogger("schedule_app.performance")
+
+
+class QueryTracker:
+    """Database execute wrapper counting queries and the time spent running them.
+
+    Attributes:
+        count (int): Number of executed queries.
+        duration (float): Total time spent in the database, in seconds.
+        queries (list[tuple[str, float]] | None): SQL and duration of every query,
+            collected only when `capture_sql` is set.
+    """
+
+    def __init__(self, capture_sql: bool = False) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.queries: list[tuple[str, float]] | None = [] if capture_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+
+            if self.queries is not None:
+                self.queries.append((sql, elapsed))
+
+
+class PerformanceMiddleware:
+    """Records wall time, DB query count and DB time of every request.
+
+    Observations are labelled with the resolved view name, the method and the response
+    status and exposed on the metrics endpoint. A sampled fraction of the requests
+    (SLOW_REQUEST_SAMPLE_RATE) additionally captures its SQL, which is logged when the
+    request takes longer than SLOW_REQUEST_THRESHOLD seconds.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        capture_sql = random.random() < settings.SLOW_REQUEST_SAMPLE_RATE
+        tracker = QueryTracker(capture_sql)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(tracker))
+
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        labels = {
+            # unresolved paths are grouped to keep the number of series bounded
+            "view": match.view_name if match else "<unresolved>",
+            "method": request.method,
+            "status": response.status_code,
+        }
+        metrics.request_duration.observe(duration, **labels)
+        metrics.request_db_queries.observe(tracker.count, **labels)
+        metrics.request_db_duration.observe(tracker.duration, **labels)
+
+        if capture_sql and duration >= settings.SLOW_REQUEST_THRESHOLD:
+            logger.warning(
+                "Slow request %s %s (%s): %.3fs, %d queries in %.3fs\n%s",
+                request.method,
+                request.path,
+                labels["view"],
+                duration,
+                tracker.count,
+                tracker.duration,
+                "\n".join(f"[{elapsed:.4f}s] {sql}" for sql, elapsed in tracker.queries),
+            )
+
+        return response
+
+
+class CompressionMiddleware:
+    """Compresses API responses with brotli or gzip, whichever the client prefers.
+
+    Only responses under COMPRESSION_PATH_PREFIXES are compressed, responses that may
+    carry secrets next to reflected input (like the token endpoints) are left alone.
+    Streaming responses and bodies shorter than COMPRESSION_MIN_SIZE are not touched.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not request.path.startswith(settings.COMPRESSION_PATH_PREFIXES)
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = _accepted_encodings(request.headers.get("Accept-Encoding", ""))
+
+        if "br" in accepted:
+            content = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+            encoding = "br"
+
+        elif "gzip" in accepted:
+            content = gzip.compress(response.content, compresslevel=6, mtime=0)
+            encoding = "gzip"
+
+        else:
+            return response
+
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+
+        # the ETag of the uncompressed body doesn't describe the compressed one
+        if response.has_header("ETag"):
+            response["ETag"] = re.sub(r'"$', f';{encoding}"', response["ETag"])
+
+        return response
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    """Returns the content codings of an Accept-Encoding header not refused with q=0."""
+
+    accepted = set()
+
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+
+        accepted.add(coding.strip().lower())
+
+    return accepted
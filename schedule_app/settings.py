@@ -20,6 +20,28 @@ load_dotenv()
 # Custom settings
 ADMIN_ENDPOINT = os.environ["ADMIN_ENDPOINT"]
 
+# Performance metrics, exposed under the admin endpoint
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+SLOW_REQUEST_THRESHOLD = float(os.environ.get("SLOW_REQUEST_THRESHOLD", "1.0"))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get("SLOW_REQUEST_SAMPLE_RATE", "0"))
+
+# Response compression of the schedule API (schedule_app.middleware.CompressionMiddleware)
+COMPRESSION_PATH_PREFIXES = ("/api/",)
+COMPRESSION_MIN_SIZE = 512
+BROTLI_QUALITY = 5
+
+# Uploads are always spooled to disk (schedule_manager.uploads), schedule workbooks are
+# validated against these limits before they are parsed
+FILE_UPLOAD_HANDLERS = ["schedule_manager.uploads.CappedTemporaryFileUploadHandler"]
+SCHEDULE_UPLOAD_MAX_SIZE = int(os.environ.get("SCHEDULE_UPLOAD_MAX_SIZE", 10 * 1024 * 1024))
+SCHEDULE_UPLOAD_MAX_UNPACKED_SIZE = 20 * SCHEDULE_UPLOAD_MAX_SIZE
+SCHEDULE_UPLOAD_MAX_SHEETS = 10
+
+# Delta sync (schedule_manager.sync), changes are re-sent for this many seconds before the
+# cursor, tombstones are kept and cursors accepted for this many days
+SYNC_CURSOR_OVERLAP = int(os.environ.get("SYNC_CURSOR_OVERLAP", "60"))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -57,6 +79,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "schedule_app.middleware.PerformanceMiddleware",
+    "schedule_app.db_router.ReplicaPinningMiddleware",
+    "schedule_app.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -91,20 +116,96 @@ WSGI_APPLICATION = "schedule_app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.mysql",
-        "NAME": os.environ["DB_NAME"],
-        "USER": os.environ["DB_USER"],
-        "PASSWORD": os.environ["DB_PASSWORD"],
-        "HOST": os.environ["DB_HOST"],
-        "PORT": 3306,
+# DB_ENGINE=sqlite runs the app against a local SQLite file (used by the benchmarks
+# and for running the test suite without a MySQL server)
+DB_ENGINE = os.environ.get("DB_ENGINE", "mysql")
+
+if DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            # concurrent writers (threaded imports, several workers) wait for each other
+            # instead of failing on a lock upgrade
+            "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+            # a file, the shared in-memory database can't be written from several threads
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+        }
     }
-}
+
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.mysql",
+            "NAME": os.environ["DB_NAME"],
+            "USER": os.environ["DB_USER"],
+            "PASSWORD": os.environ["DB_PASSWORD"],
+            "HOST": os.environ["DB_HOST"],
+            "PORT": 3306,
+        }
+    }
+
+# Read replicas, comma separated: MySQL hosts, or database files with DB_ENGINE=sqlite
+DATABASE_REPLICAS = []
+
+for index, replica in enumerate(filter(None, os.environ.get("DB_REPLICAS", "").split(","))):
+    alias = f"replica_{index}"
+
+    if DB_ENGINE == "sqlite":
+        DATABASES[alias] = {"ENGINE": "django.db.backends.sqlite3", "NAME": replica}
+    else:
+        DATABASES[alias] = {**DATABASES["default"], "HOST": replica}
+
+    # tests run against the primary only
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["schedule_app.db_router.PrimaryReplicaRouter"]
+
+# how long reads stay on the primary after schedule data was written
+DATABASE_REPLICA_PIN_SECONDS = float(os.environ.get("DB_REPLICA_PIN_SECONDS", "10"))
 
 TEST = ""
 
 
+# Cache
+# Throttling counters and the replica pin have to be shared by all workers, so set
+# REDIS_URL (e.g. redis://redis:6379/0, needs the redis package) in production.
+# Without it every process counts on its own.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Push of schedule changes (schedule_manager.events), the backend has to be shared by all
+# workers too, so it goes through Redis whenever REDIS_URL is set
+
+if os.environ.get("REDIS_URL"):
+    SCHEDULE_EVENTS = {
+        "BACKEND": "schedule_manager.events.RedisEventBackend",
+        "OPTIONS": {"url": os.environ["REDIS_URL"]},
+    }
+
+else:
+    SCHEDULE_EVENTS = {
+        "BACKEND": "schedule_manager.events.LocalEventBackend",
+    }
+
+# idle event streams send a comment this often so proxies don't close them
+EVENTS_HEARTBEAT_SECONDS = int(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -130,6 +231,26 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    # ?format=columnar / ?format=msgpack or the matching Accept header
+    "DEFAULT_RENDERER_CLASSES": (
+        "schedule_app.renderers.ORJSONRenderer",
+        "schedule_app.renderers.ColumnarJSONRenderer",
+        "schedule_app.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # budgets of the throttles in schedule_app/throttling.py. The per-IP ones are shared by
+    # a whole store behind one NAT when a schedule is published, guessing passwords is
+    # limited by the per-account budgets
+    "DEFAULT_THROTTLE_RATES": {
+        "login": os.environ.get("THROTTLE_LOGIN_RATE", "300/min"),
+        "login_user": os.environ.get("THROTTLE_LOGIN_USER_RATE", "5/min"),
+        "refresh": os.environ.get("THROTTLE_REFRESH_RATE", "600/min"),
+        "refresh_user": os.environ.get("THROTTLE_REFRESH_USER_RATE", "10/min"),
+        "schedule": os.environ.get("THROTTLE_SCHEDULE_RATE", "60/min"),
+    },
+    # proxies in front of the app whose X-Forwarded-For entries are trusted. 0 uses the
+    # address of the connection, any other client could pick its IP through the header
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", "0")),
 }
 
 # SimpleJWT setings
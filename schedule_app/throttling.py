@@ -0,0 +1,86 @@
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import UntypedToken
+
+
+# None of the throttles below touch the database or request.user, so a throttled request
+# is rejected before the user lookup and the password hash. Counters live in the default
+# cache, which should be shared between workers (see CACHES in settings).
+
+
+def _token_user_id(raw_token: str | None) -> str | None:
+    """Returns the user id claim of a JWT, verifying only its signature and expiry."""
+
+    if not raw_token:
+        return None
+
+    try:
+        return str(UntypedToken(raw_token)["user_id"])
+
+    except (TokenError, KeyError):
+        return None
+
+
+def _data_field(request, name: str):
+    """Returns a field of the request body, None when the body isn't an object."""
+
+    if not isinstance(request.data, dict):
+        return None
+
+    return request.data.get(name)
+
+
+class IPRateThrottle(SimpleRateThrottle):
+    """Limits requests per client IP."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class LoginRateThrottle(IPRateThrottle):
+    scope = "login"
+
+
+class LoginUserRateThrottle(SimpleRateThrottle):
+    """Limits login attempts per account, whichever IPs they come from."""
+
+    scope = "login_user"
+
+    def get_cache_key(self, request, view):
+        email = _data_field(request, "email")
+        if not isinstance(email, str) or not email:
+            return None
+
+        return self.cache_format % {"scope": self.scope, "ident": email.strip().lower()}
+
+
+class RefreshRateThrottle(IPRateThrottle):
+    scope = "refresh"
+
+
+class RefreshUserRateThrottle(SimpleRateThrottle):
+    """Limits token refreshes per user of the refresh token."""
+
+    scope = "refresh_user"
+
+    def get_cache_key(self, request, view):
+        user_id = _token_user_id(_data_field(request, "refresh"))
+        if user_id is None:
+            return None
+
+        return self.cache_format % {"scope": self.scope, "ident": user_id}
+
+
+class ScheduleRateThrottle(SimpleRateThrottle):
+    """Limits schedule reads per user of the access token, or per IP without one."""
+
+    scope = "schedule"
+
+    def get_cache_key(self, request, view):
+        scheme, _, raw_token = request.headers.get("Authorization", "").partition(" ")
+        user_id = _token_user_id(raw_token) if scheme == "Bearer" else None
+
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": f"user:{user_id}" if user_id else f"ip:{self.get_ident(request)}",
+        }
@@ -18,10 +18,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
+from .views import metrics_view, live_view, ready_view
 
 
 urlpatterns = [
+    path(f"{settings.ADMIN_ENDPOINT}/metrics/", metrics_view, name="metrics"),
     path(f"{settings.ADMIN_ENDPOINT}/", admin.site.urls),
+    path("health/live/", live_view, name="health_live"),
+    path("health/ready/", ready_view, name="health_ready"),
     path("auth/", include("authentication.urls")),
     path("api/", include("schedule_manager.urls")),
 ]
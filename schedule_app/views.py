@@ -0,0 +1,55 @@
+import hmac
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+
+from .metrics import render_metrics
+
+
+def metrics_view(request):
+    """Exposes the performance metrics in the Prometheus text format.
+
+    Available to logged in staff members and to scrapers sending
+    `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+
+    authorization = request.headers.get("Authorization", "")
+    token_valid = bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+        authorization, f"Bearer {settings.METRICS_TOKEN}"
+    )
+
+    if not token_valid and not (request.user.is_active and request.user.is_staff):
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def live_view(request):
+    """Liveness probe, answers as long as the process serves requests."""
+
+    return JsonResponse({"status": "ok"})
+
+
+def ready_view(request):
+    """Readiness probe, checks that the primary database and the replicas answer.
+
+    Unavailable replicas are reported but only the primary makes the service not ready.
+    """
+
+    databases = {}
+    for alias in ["default", *settings.DATABASE_REPLICAS]:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            databases[alias] = "ok"
+
+        except DatabaseError:
+            databases[alias] = "unavailable"
+
+    ready = databases["default"] == "ok"
+
+    return JsonResponse(
+        {"status": "ok" if ready else "unavailable", "databases": databases},
+        status=200 if ready else 503,
+    )
@@ -3,27 +3,139 @@ from .models import EmployeeSchedule, Shift
 from django import forms
 from django.urls import path, reverse
 from django.shortcuts import render
-from io import BytesIO
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 from .schedule_parser import ScheduleParser
-from django.contrib.auth import get_user_model
-from .serializers import EmployeeScheduleSerializer
-from dataclasses import asdict
+from .layouts import UnknownLayout
+from .importer import import_employees
 from django.http import HttpResponseRedirect
+from schedule_app.metrics import import_stage_duration
+from .uploads import validate_workbook, parser_source, InvalidWorkbook
+from .coverage import (
+    Coverage,
+    coverage_for_range,
+    coverage_for_employees,
+    SLOT_MINUTES,
+    MAX_COVERAGE_DAYS,
+)
+import datetime
+import time
 
 
-User = get_user_model()
+def _clean_workbook(schedule_file):
+    try:
+        validate_workbook(schedule_file)
+
+    except InvalidWorkbook as error:
+        raise forms.ValidationError(str(error))
+
+    return schedule_file
+
+
+def _upload_too_large(request) -> str | None:
+    """Returns an error message if the uploaded schedule file was over the size limit."""
+
+    if "schedule_file" in getattr(request, "oversized_uploads", ()):
+        return f"The file is larger than {filesizeformat(settings.SCHEDULE_UPLOAD_MAX_SIZE)}."
+
+    return None
 
 
 class ScheduleUploadForm(forms.Form):
     schedule_file = forms.FileField()
 
+    def clean_schedule_file(self):
+        return _clean_workbook(self.cleaned_data["schedule_file"])
+
+
+class CoverageForm(forms.Form):
+    start = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+    end = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+    min_staff = forms.IntegerField(
+        required=False, min_value=1, help_text="Highlight slots with fewer employees."
+    )
+    schedule_file = forms.FileField(
+        required=False,
+        help_text="Check a schedule before uploading it instead of the dates above.",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # the dates are not needed when checking a file
+        if self.files.get("schedule_file"):
+            self.fields["start"].required = False
+            self.fields["end"].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+
+        if start and end and not 0 <= (end - start).days < MAX_COVERAGE_DAYS:
+            raise forms.ValidationError(
+                f"End has to be within {MAX_COVERAGE_DAYS} days after start."
+            )
+
+        return cleaned_data
+
+    def clean_schedule_file(self):
+        schedule_file = self.cleaned_data["schedule_file"]
+
+        return _clean_workbook(schedule_file) if schedule_file else schedule_file
+
+
+def _heatmap(coverage: Coverage, min_staff: int | None) -> dict:
+    """Prepares the coverage matrix for the admin heatmap template.
+
+    Only the slots between the first and the last one with anybody at work are shown.
+    """
+
+    covered_slots = coverage.counts.any(axis=0).nonzero()[0]
+    if not len(covered_slots):
+        return {"slots": [], "rows": []}
+
+    first_slot, last_slot = covered_slots[0], covered_slots[-1] + 1
+    counts = coverage.counts[:, first_slot:last_slot]
+    highest = max(int(counts.max()), 1)
+
+    slots = []
+    for slot in range(first_slot, last_slot):
+        hour, minute = divmod(int(slot) * SLOT_MINUTES, 60)
+        slots.append(f"{hour}:00" if minute == 0 else "")
+
+    rows = []
+    for day, day_counts in zip(coverage.days, counts.tolist()):
+        cells = []
+        for count in day_counts:
+            if min_staff and count < min_staff:
+                color = "rgba(220, 53, 69, 0.6)"
+            else:
+                color = f"rgba(33, 150, 243, {count / highest:.2f})"
+
+            cells.append({"count": count, "color": color})
+
+        rows.append(
+            {
+                "day": day,
+                "cells": cells,
+                "vacation": coverage.vacation.get(day, []),
+                "unavailable": coverage.unavailable.get(day, []),
+            }
+        )
+
+    return {"slots": slots, "rows": rows}
+
 
 class EmployeeScheduleAdmin(admin.ModelAdmin):
-    list_display = ("user", "month", "year")
+    list_display = ("user", "month", "year", "archived")
+    list_filter = ("archived",)
 
     def get_urls(self):
         urls = super().get_urls()
-        new_urls = [path("upload-schedule/", self.upload_schedule)]
+        new_urls = [
+            path("upload-schedule/", self.admin_site.admin_view(self.upload_schedule)),
+            path("coverage/", self.admin_site.admin_view(self.coverage)),
+        ]
 
         return new_urls + urls
 
@@ -31,32 +143,31 @@ class EmployeeScheduleAdmin(admin.ModelAdmin):
 
         if request.method == "POST":
             schedule_parser = ScheduleParser()
-            schedule_file = request.FILES["schedule_file"]
+            # the file has been spooled to disk, validation only reads its zip directory
+            form = ScheduleUploadForm(request.POST, request.FILES)
+
+            error = _upload_too_large(request)
+            if error is None and not form.is_valid():
+                error = " ".join(form.errors.get("schedule_file", ["Invalid upload."]))
 
-            if not schedule_file.name.endswith(".xlsx"):
-                messages.warning(request, "Wrong file type was uploaded.")
+            if error:
+                messages.warning(request, error)
                 return HttpResponseRedirect(request.path_info)
 
-            schedule_parser.parse(BytesIO(schedule_file.read()))
-            employees_success = []
-            employees_fail = []
+            try:
+                schedule_parser.parse(parser_source(form.cleaned_data["schedule_file"]))
 
-            for employee in schedule_parser.full_schedule:
-                user = User.objects.get(
-                    first_name=employee.first_name, last_name=employee.last_name
-                )
+            except UnknownLayout as error:
+                messages.warning(request, str(error))
+                return HttpResponseRedirect(request.path_info)
 
-                employee_string = f"{employee.first_name} {employee.last_name}"
-                if not user:
-                    employees_fail.append(employee_string)
-                    continue
+            for stage, duration in schedule_parser.timings.items():
+                import_stage_duration.observe(duration, stage=stage)
 
-                serializer = EmployeeScheduleSerializer(
-                    data=asdict(employee.schedule), context={"user": user}
-                )
-                if serializer.is_valid(raise_exception=True):
-                    serializer.save()
-                    employees_success.append(employee_string)
+            save_start = time.perf_counter()
+            result = import_employees(schedule_parser.full_schedule)
+            employees_success, employees_fail = result.matched, result.unmatched
+            import_stage_duration.observe(time.perf_counter() - save_start, stage="save")
 
             if employees_success:
                 messages.info(
@@ -67,7 +178,19 @@ class EmployeeScheduleAdmin(admin.ModelAdmin):
             if employees_fail:
                 messages.warning(
                     request,
-                    f"Employees not found in database: {', '.join(employees_fail)}.",
+                    "Employees not found in database (or not unique): "
+                    f"{', '.join(employees_fail)}.",
+                )
+
+            if result.invalid:
+                messages.warning(
+                    request,
+                    "Schedules not saved because of invalid cells: "
+                    + "; ".join(
+                        f"{employee} ({', '.join(problems)})"
+                        for employee, problems in result.invalid.items()
+                    )
+                    + ".",
                 )
 
             return HttpResponseRedirect(
@@ -79,6 +202,50 @@ class EmployeeScheduleAdmin(admin.ModelAdmin):
 
         return render(request, "admin/schedule_upload.html", data)
 
+    def coverage(self, request):
+        """Shows how many employees are at work in every 15-minute slot of a date range.
+
+        With a schedule file the coverage of the parsed, not yet imported, month is shown
+        as a pre-publish check.
+        """
+
+        if request.method == "POST":
+            form = CoverageForm(request.POST, request.FILES)
+
+            error = _upload_too_large(request)
+            if error:
+                form.add_error("schedule_file", error)
+
+        else:
+            today = datetime.date.today()
+            form = CoverageForm(
+                request.GET or None, initial={"start": today.replace(day=1), "end": today}
+            )
+
+        data = {"form": form, "title": "Staffing coverage"}
+
+        if form.is_bound and form.is_valid():
+            schedule_file = form.cleaned_data["schedule_file"]
+
+            coverage = None
+
+            if schedule_file:
+                schedule_parser = ScheduleParser()
+                try:
+                    schedule_parser.parse(parser_source(schedule_file))
+                    coverage = coverage_for_employees(schedule_parser.full_schedule)
+
+                except UnknownLayout as error:
+                    form.add_error("schedule_file", str(error))
+
+            else:
+                coverage = coverage_for_range(form.cleaned_data["start"], form.cleaned_data["end"])
+
+            if coverage is not None:
+                data.update(_heatmap(coverage, form.cleaned_data["min_staff"]))
+
+        return render(request, "admin/schedule_coverage.html", data)
+
 
 class ShiftAdmin(admin.ModelAdmin):
     list_display = (
@@ -5,3 +5,6 @@ class ScheduleManagerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "schedule_manager"
     verbose_name = "schedule manager"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,150 @@
+import datetime
+import json
+import zlib
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import EmployeeSchedule, Shift, ShiftArchive, ShiftDayType
+from .signals import sync_tracking_disabled
+
+
+# bumped whenever the packed layout changes, so old archives can still be read
+PACK_VERSION = 1
+
+DAY_TYPES: list[str] = list(ShiftDayType.values)
+
+
+def _time_to_minutes(time: datetime.time | None) -> int | None:
+    return None if time is None else time.hour * 60 + time.minute
+
+
+def _minutes_to_time(minutes: int | None) -> datetime.time | None:
+    return None if minutes is None else datetime.time(*divmod(minutes, 60))
+
+
+def pack_shifts(shifts: Iterable[Shift]) -> bytes:
+    """Packs shifts of a single schedule into a compact compressed blob.
+
+    Every shift is stored as [id, day of month, start minute, end minute, day type index,
+    additional info], the month and year come from the schedule itself.
+
+    Args:
+        shifts (Iterable[Shift]): Shifts belonging to one schedule.
+
+    Returns:
+        bytes: zlib-compressed JSON.
+    """
+
+    rows = [
+        [
+            shift.id,
+            shift.date.day,
+            _time_to_minutes(shift.time_start),
+            _time_to_minutes(shift.time_end),
+            DAY_TYPES.index(shift.day_type),
+            shift.additional_info,
+        ]
+        for shift in shifts
+    ]
+
+    return zlib.compress(
+        json.dumps({"v": PACK_VERSION, "shifts": rows}, separators=(",", ":")).encode(), 9
+    )
+
+
+def unpack_shifts(data: bytes, schedule: EmployeeSchedule) -> list[Shift]:
+    """Unpacks shifts packed by `pack_shifts`.
+
+    Args:
+        data (bytes): Packed shifts.
+        schedule (EmployeeSchedule): Schedule the shifts belong to.
+
+    Returns:
+        list[Shift]: Unsaved shifts with their original ids, ordered by date.
+    """
+
+    packed = json.loads(zlib.decompress(data))
+
+    return [
+        Shift(
+            id=shift_id,
+            schedule=schedule,
+            date=datetime.date(schedule.year, schedule.month, day),
+            time_start=_minutes_to_time(time_start),
+            time_end=_minutes_to_time(time_end),
+            day_type=DAY_TYPES[day_type],
+            additional_info=additional_info,
+        )
+        for shift_id, day, time_start, time_end, day_type, additional_info in packed["shifts"]
+    ]
+
+
+def archived_schedules(start: datetime.date, end: datetime.date):
+    """Returns the archived schedules of the months a date range touches.
+
+    Their shifts aren't in the Shift table, readers of a range get them from
+    `EmployeeSchedule.get_shifts()`.
+
+    Args:
+        start (datetime.date): First day of the range.
+        end (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        QuerySet: Archived EmployeeSchedules.
+    """
+
+    months = Q(pk__in=[])
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months |= Q(year=year, month=month)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    return EmployeeSchedule.objects.filter(months, archived=True)
+
+
+def archive_schedule(schedule: EmployeeSchedule) -> int:
+    """Moves the shifts of a schedule from the Shift table into a ShiftArchive.
+
+    Args:
+        schedule (EmployeeSchedule): Schedule to archive.
+
+    Returns:
+        int: Number of archived shifts.
+    """
+
+    # archived shifts are still served, so clients must not see them as deleted
+    with transaction.atomic(), sync_tracking_disabled():
+        shifts = list(Shift.objects.filter(schedule=schedule).order_by("date"))
+
+        ShiftArchive.objects.create(
+            schedule=schedule, data=pack_shifts(shifts), shift_count=len(shifts)
+        )
+        Shift.objects.filter(schedule=schedule).delete()
+
+        schedule.archived = True
+        schedule.save(update_fields=["archived"])
+
+    return len(shifts)
+
+
+def restore_schedule(schedule: EmployeeSchedule) -> int:
+    """Moves archived shifts of a schedule back into the Shift table.
+
+    Args:
+        schedule (EmployeeSchedule): Archived schedule.
+
+    Returns:
+        int: Number of restored shifts.
+    """
+
+    with transaction.atomic():
+        archive = ShiftArchive.objects.get(schedule=schedule)
+        shifts = Shift.objects.bulk_create(archive.unpack())
+        archive.delete()
+
+        schedule.archived = False
+        schedule.save(update_fields=["archived", "modified_at"])
+
+    return len(shifts)
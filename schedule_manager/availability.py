@@ -0,0 +1,194 @@
+import datetime
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FilteredRelation,
+    IntegerField,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import ExtractHour, ExtractMinute
+
+from .archive import archived_schedules
+from .coverage import UNAVAILABLE_DAY_TYPES
+from .models import EmployeeSchedule, ShiftDayType
+
+
+User = get_user_model()
+
+# longest date range searched on request
+MAX_AVAILABILITY_DAYS = 7
+
+# besides the UNAVAILABLE_DAY_TYPES, vacation blocks the whole day as well
+BLOCKING_DAY_TYPES = (ShiftDayType.VACATION, *UNAVAILABLE_DAY_TYPES)
+
+
+class ArchivedMonth(ValueError):
+    pass
+
+
+@dataclass
+class Availability:
+    """An employee who is free in the searched time window.
+
+    Attributes:
+        id (int): Id of the user.
+        first_name (str): First name of the employee.
+        last_name (str): Last name of the employee.
+        hours_worked (float): Hours of WORK shifts in the month before the first day.
+        hours_scheduled (float): Hours of WORK shifts in the whole month.
+        free_days (list[datetime.date]): Days of the range the employee is free on.
+    """
+
+    id: int
+    first_name: str
+    last_name: str
+    hours_worked: float
+    hours_scheduled: float
+    free_days: list[datetime.date] = field(default_factory=list)
+
+
+def _minutes(field_name: str):
+    return ExtractHour(field_name) * 60 + ExtractMinute(field_name)
+
+
+def find_available(
+    day: datetime.date, start: datetime.time, end: datetime.time, days: int = 1
+) -> list[Availability]:
+    """Finds the employees rostered in the month of `day` who are free in a time window.
+
+    An employee is free on a day when they have no WORK shift overlapping the window
+    (counting overnight shifts from the day before) and the day isn't a vacation, sick
+    leave or day off. Days of a month the employee has no schedule for aren't free
+    either. It is all computed in a single query: the users are joined with their shifts
+    from the month of `day` (and the day before it) until the end of the range, through
+    the (schedule, date) index, and the checks are conditional aggregates.
+
+    Args:
+        day (datetime.date): First day to search.
+        start (datetime.time): Start of the time window.
+        end (datetime.time): End of the time window, after `start`.
+        days (int, optional): Number of days to search, e.g. 7 for a week. Defaults to 1.
+
+    Returns:
+        list[Availability]: Employees free on at least one of the days, those with the
+            fewest hours worked that month first.
+
+    Raises:
+        ArchivedMonth: If the searched days fall into an archived month, whose shifts
+            aren't in the Shift table.
+    """
+
+    range_days = [day + datetime.timedelta(days=offset) for offset in range(days)]
+    month_start = day.replace(day=1)
+    month_end = (month_start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(
+        days=1
+    )
+    first_day = min(month_start, day - datetime.timedelta(days=1))
+    last_day = max(month_end, range_days[-1])
+
+    # closed months are archived long before anyone looks for a replacement in them
+    if archived_schedules(first_day, last_day).exists():
+        raise ArchivedMonth(f"{day:%m/%Y} or the days around it are archived")
+    overnight_shift = Q(shifts__time_end__lte=F("shifts__time_start"))
+    # overnight shifts end on the next day
+    duration = (
+        _minutes("shifts__time_end")
+        - _minutes("shifts__time_start")
+        + Case(When(overnight_shift, then=Value(24 * 60)), default=Value(0))
+    )
+    work = Q(shifts__day_type=ShiftDayType.WORK)
+
+    annotations = {
+        "hours_scheduled": Sum(
+            Case(
+                When(work & Q(shifts__date__range=(month_start, month_end)), then=duration),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        ),
+        "hours_worked": Sum(
+            Case(
+                When(work & Q(shifts__date__gte=month_start, shifts__date__lt=day), then=duration),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        ),
+    }
+
+    # plain time comparisons, no minute arithmetic needed
+    for index, current in enumerate(range_days):
+        conflict = (
+            Q(shifts__date=current, shifts__day_type__in=BLOCKING_DAY_TYPES)
+            | (
+                work
+                & Q(shifts__date=current, shifts__time_start__lt=end)
+                & (Q(shifts__time_end__gt=start) | overnight_shift)
+            )
+            | (
+                work
+                & Q(shifts__date=current - datetime.timedelta(days=1), shifts__time_end__gt=start)
+                & overnight_shift
+            )
+        )
+        annotations[f"conflicts_{index}"] = Count("shifts", filter=conflict)
+
+    # a day of another month is only free for those rostered in that month too
+    rostered = {
+        (current.year, current.month): Exists(
+            EmployeeSchedule.objects.filter(
+                user=OuterRef("pk"), year=current.year, month=current.month
+            )
+        )
+        for current in range_days
+    }
+    for (year, month), exists in rostered.items():
+        if (year, month) != (day.year, day.month):
+            annotations[f"rostered_{year}_{month}"] = exists
+
+    rows = (
+        User.objects.filter(rostered[day.year, day.month], is_active=True)
+        .alias(
+            shifts=FilteredRelation(
+                "employeeschedule__shift",
+                condition=Q(
+                    employeeschedule__shift__date__gte=first_day,
+                    employeeschedule__shift__date__lte=last_day,
+                ),
+            )
+        )
+        .annotate(**annotations)
+        .values("id", "first_name", "last_name", *annotations)
+    )
+
+    available = []
+    for row in rows:
+        free_days = [
+            current
+            for index, current in enumerate(range_days)
+            if not row[f"conflicts_{index}"]
+            and row.get(f"rostered_{current.year}_{current.month}", True)
+        ]
+        if free_days:
+            available.append(
+                Availability(
+                    id=row["id"],
+                    first_name=row["first_name"],
+                    last_name=row["last_name"],
+                    hours_worked=(row["hours_worked"] or 0) / 60,
+                    hours_scheduled=(row["hours_scheduled"] or 0) / 60,
+                    free_days=free_days,
+                )
+            )
+
+    available.sort(key=lambda employee: (employee.hours_worked, employee.last_name))
+
+    return available
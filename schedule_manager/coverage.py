@@ -0,0 +1,205 @@
+from __future__ import annotations
+import datetime
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .archive import archived_schedules
+from .models import Shift, ShiftDayType
+
+# NumPy is imported on first use, see schedule_parser.py
+if TYPE_CHECKING:
+    import numpy as np
+    from .schedule_parser import Employee
+
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# longest date range coverage is built for on request
+MAX_COVERAGE_DAYS = 62
+
+# day types that make an employee unavailable for the whole day
+UNAVAILABLE_DAY_TYPES = (
+    ShiftDayType.AVAILABILITY_OFF,
+    ShiftDayType.SICK_LEAVE,
+    ShiftDayType.REQUESTED_OFF,
+)
+
+
+@dataclass
+class Coverage:
+    """Number of employees at work in every 15-minute slot of a date range.
+
+    Attributes:
+        start (datetime.date): First day of the range.
+        end (datetime.date): Last day of the range (inclusive).
+        counts (np.ndarray): Matrix of shape (days, SLOTS_PER_DAY) with the number of
+            employees on a WORK shift in each slot.
+        vacation (dict[datetime.date, list[str]]): Employees on vacation, per day.
+        unavailable (dict[datetime.date, list[str]]): Employees who are off, sick or
+            requested a day off, per day.
+    """
+
+    start: datetime.date
+    end: datetime.date
+    counts: np.ndarray
+    vacation: dict[datetime.date, list[str]] = field(default_factory=dict)
+    unavailable: dict[datetime.date, list[str]] = field(default_factory=dict)
+
+    @property
+    def days(self) -> list[datetime.date]:
+        return [
+            self.start + datetime.timedelta(days=offset) for offset in range(len(self.counts))
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "slot_minutes": SLOT_MINUTES,
+            "days": [
+                {
+                    "date": day,
+                    "counts": counts.tolist(),
+                    "vacation": self.vacation.get(day, []),
+                    "unavailable": self.unavailable.get(day, []),
+                }
+                for day, counts in zip(self.days, self.counts)
+            ],
+        }
+
+
+def _minutes(time: datetime.time) -> int:
+    return time.hour * 60 + time.minute
+
+
+def build_coverage(
+    start: datetime.date,
+    end: datetime.date,
+    shifts: Iterable[tuple[datetime.date, datetime.time | None, datetime.time | None, str, str]],
+) -> Coverage:
+    """Builds the coverage matrix of a date range.
+
+    Every WORK shift adds +1 at its first slot and -1 after its last slot of a difference
+    array spanning the whole range, a cumulative sum then gives the number of employees
+    in every slot. Partially covered slots count as covered and shifts ending at or before
+    their start time run past midnight into the next day.
+
+    Args:
+        start (datetime.date): First day of the range.
+        end (datetime.date): Last day of the range (inclusive).
+        shifts (Iterable[tuple]): (date, time_start, time_end, day_type, employee name)
+            tuples. Shifts outside of the range are ignored, except for overnight shifts
+            from the day before `start`.
+
+    Returns:
+        Coverage: Coverage of the range.
+    """
+
+    import numpy as np
+
+    days = (end - start).days + 1
+    coverage = Coverage(start, end, np.zeros((days, SLOTS_PER_DAY), dtype=np.int32))
+
+    offsets, starts, ends = [], [], []
+    for date, time_start, time_end, day_type, name in shifts:
+        offset = (date - start).days
+
+        if day_type == ShiftDayType.WORK and time_start and time_end:
+            offsets.append(offset)
+            starts.append(_minutes(time_start))
+            ends.append(_minutes(time_end))
+
+        elif 0 <= offset < days and day_type == ShiftDayType.VACATION:
+            coverage.vacation.setdefault(date, []).append(name)
+
+        elif 0 <= offset < days and day_type in UNAVAILABLE_DAY_TYPES:
+            coverage.unavailable.setdefault(date, []).append(name)
+
+    if not offsets:
+        return coverage
+
+    offsets_array = np.array(offsets, dtype=np.int64) * SLOTS_PER_DAY
+    starts_array = np.array(starts, dtype=np.int64)
+    ends_array = np.array(ends, dtype=np.int64)
+    ends_array = np.where(ends_array <= starts_array, ends_array + 24 * 60, ends_array)
+
+    total_slots = days * SLOTS_PER_DAY
+    first_slots = np.clip(offsets_array + starts_array // SLOT_MINUTES, 0, total_slots)
+    last_slots = np.clip(offsets_array - (-ends_array // SLOT_MINUTES), 0, total_slots)
+
+    difference = np.zeros(total_slots + 1, dtype=np.int32)
+    np.add.at(difference, first_slots, 1)
+    np.add.at(difference, last_slots, -1)
+
+    coverage.counts = np.cumsum(difference[:-1], dtype=np.int32).reshape(days, SLOTS_PER_DAY)
+
+    return coverage
+
+
+def coverage_for_range(start: datetime.date, end: datetime.date) -> Coverage:
+    """Builds the coverage of a date range from the Shift table and the archived months.
+
+    Args:
+        start (datetime.date): First day of the range.
+        end (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        Coverage: Coverage of the range.
+    """
+
+    # the day before can have shifts running past midnight
+    first_day = start - datetime.timedelta(days=1)
+
+    rows = Shift.objects.filter(date__range=(first_day, end)).values_list(
+        "date",
+        "time_start",
+        "time_end",
+        "day_type",
+        "schedule__user__first_name",
+        "schedule__user__last_name",
+    )
+    shifts = [
+        (date, time_start, time_end, day_type, f"{first_name} {last_name}")
+        for date, time_start, time_end, day_type, first_name, last_name in rows.iterator()
+    ]
+
+    # shifts of archived months are packed, not in the Shift table
+    for schedule in archived_schedules(first_day, end).select_related("user", "shiftarchive"):
+        name = f"{schedule.user.first_name} {schedule.user.last_name}"
+        shifts.extend(
+            (shift.date, shift.time_start, shift.time_end, shift.day_type, name)
+            for shift in schedule.get_shifts()
+            if first_day <= shift.date <= end
+        )
+
+    return build_coverage(start, end, shifts)
+
+
+def coverage_for_employees(employees: list[Employee]) -> Coverage:
+    """Builds the coverage of a month parsed by ScheduleParser, before it is imported.
+
+    Args:
+        employees (list[Employee]): `ScheduleParser.full_schedule` of a parsed sheet.
+
+    Returns:
+        Coverage: Coverage of the whole parsed month.
+    """
+
+    shifts = [
+        (
+            shift.date,
+            shift.time_start,
+            shift.time_end,
+            shift.day_type,
+            f"{employee.first_name} {employee.last_name}",
+        )
+        for employee in employees
+        for shift in employee.schedule.shifts
+    ]
+
+    start = min((shift[0] for shift in shifts), default=datetime.date.today())
+    end = max((shift[0] for shift in shifts), default=start)
+
+    return build_coverage(start, end, shifts)
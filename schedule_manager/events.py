@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+# sent instead of the events a slow client missed, it should sync everything again
+RESYNC_EVENT = {"type": "resync"}
+
+
+class Subscription:
+    """Events published for one user, read by one open connection.
+
+    Events can be delivered from any thread, they are handed over to the event loop the
+    subscription was created in.
+    """
+
+    def __init__(self, backend: "LocalEventBackend", user_id: str, maxsize: int) -> None:
+        self.backend = backend
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> list[dict]:
+        """Waits for the next events.
+
+        Args:
+            timeout (float): Seconds to wait.
+
+        Returns:
+            list[dict]: Every pending event with only the latest one kept per schedule,
+                empty if nothing came within the timeout.
+        """
+
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+
+        except TimeoutError:
+            return []
+
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+
+        if self.overflowed:
+            self.overflowed = False
+            return [RESYNC_EVENT]
+
+        # an upload changes many shifts of the same schedule at once
+        return list({(event["type"], event.get("id")): event for event in events}.values())
+
+    def close(self) -> None:
+        self.backend.unsubscribe(self)
+
+
+class LocalEventBackend:
+    """Pub/sub within a single process.
+
+    Subscribers are only idle coroutines waiting on a queue, so a worker can hold
+    thousands of them. Events published in other processes are not seen, deployments
+    with several workers need a shared backend like `RedisEventBackend`.
+    """
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        # keyed by the user id as a string, the way it comes in the token claims
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+
+    async def subscribe(self, user_id: int | str) -> Subscription:
+        subscription = Subscription(self, str(user_id), self.queue_size)
+
+        with self._lock:
+            self._subscriptions[subscription.user_id].add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id: int | str, event: dict) -> None:
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id: int | str, event: dict) -> None:
+        """Hands an event to the subscriptions of a user in this process."""
+
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(str(user_id), ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+            except RuntimeError:
+                # the loop is closed, the subscription is about to go away
+                pass
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+class RedisEventBackend(LocalEventBackend):
+    """Shares events between worker processes through Redis pub/sub.
+
+    Every process keeps a single Redis subscription and fans the events out to its local
+    subscribers. Needs the redis package.
+    """
+
+    channel_prefix = "schedule_events:"
+
+    def __init__(self, url: str, queue_size: int = 100) -> None:
+        import redis
+
+        super().__init__(queue_size)
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._listener: asyncio.Task | None = None
+
+    def publish(self, user_id: int | str, event: dict) -> None:
+        self._client.publish(f"{self.channel_prefix}{user_id}", json.dumps(event))
+
+    async def subscribe(self, user_id: int | str) -> Subscription:
+        subscription = await super().subscribe(user_id)
+
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+        return subscription
+
+    async def _listen(self) -> None:
+        import redis
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+
+        while True:
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{self.channel_prefix}*")
+
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+
+                        channel = message["channel"].decode()
+                        user_id = channel.removeprefix(self.channel_prefix)
+                        self.deliver(user_id, json.loads(message["data"]))
+
+            except redis.ConnectionError:
+                logger.warning("Lost the Redis event subscription, reconnecting", exc_info=True)
+                # events published in the meantime are lost, let the clients resync
+                with self._lock:
+                    user_ids = list(self._subscriptions)
+
+                for user_id in user_ids:
+                    self.deliver(user_id, RESYNC_EVENT)
+
+                await asyncio.sleep(1)
+
+
+@lru_cache
+def get_backend() -> LocalEventBackend:
+    """Returns the process wide backend configured in the SCHEDULE_EVENTS setting."""
+
+    config = settings.SCHEDULE_EVENTS
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+def publish_schedule_event(schedule, action: str) -> None:
+    """Tells the owner of a schedule that it was created, updated or deleted.
+
+    The event is published once the current transaction commits, so clients reacting to
+    it read the new data. A failing backend is logged and doesn't break the change.
+
+    Args:
+        schedule (EmployeeSchedule): Changed schedule.
+        action (str): "created", "updated" or "deleted".
+    """
+
+    user_id = schedule.user_id
+    event = {
+        "type": "schedule",
+        "action": action,
+        "id": schedule.pk,
+        "month": schedule.month,
+        "year": schedule.year,
+    }
+
+    transaction.on_commit(lambda: get_backend().publish(user_id, event), robust=True)
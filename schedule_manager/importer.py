@@ -0,0 +1,318 @@
+import logging
+import random
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .archive import restore_schedule
+from .events import publish_schedule_event
+from .models import EmployeeSchedule, Shift, ShiftDayType
+from .schedule_parser import Employee
+
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SHIFT_FIELDS = ("time_start", "time_end", "day_type", "additional_info")
+
+ADDITIONAL_INFO_MAX_LENGTH = Shift._meta.get_field("additional_info").max_length
+
+# MySQL error codes of a lock wait timeout, a deadlock and a duplicate entry
+MYSQL_CONFLICT_CODES = {1205, 1213, 1062}
+# PostgreSQL SQLSTATEs of a serialization failure, a deadlock, a lock timeout and a
+# unique violation
+POSTGRESQL_CONFLICT_CODES = {"40001", "40P01", "55P03", "23505"}
+
+# (user id, year, month), also the order in which schedule rows are locked
+ScheduleKey = tuple[int, int, int]
+
+
+class InvalidShifts(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import.
+
+    Attributes:
+        matched (list[str]): Full names of the employees whose schedules were saved.
+        unmatched (list[str]): Full names without exactly one matching user.
+        invalid (dict[str, list[str]]): Problems of the shifts, per full name, of the
+            employees whose schedules weren't saved because of them.
+        schedules_created (int): Number of newly created schedules.
+        shifts_created (int): Number of newly created shifts.
+        shifts_updated (int): Number of existing shifts that changed.
+        retries (int): Number of batches retried after a lock conflict or deadlock.
+    """
+
+    matched: list[str] = field(default_factory=list)
+    unmatched: list[str] = field(default_factory=list)
+    invalid: dict[str, list[str]] = field(default_factory=dict)
+    schedules_created: int = 0
+    shifts_created: int = 0
+    shifts_updated: int = 0
+    retries: int = 0
+
+
+def validate_shifts(shifts: Iterable[dict]) -> list[str]:
+    """Checks shift dicts before they are written, the way the Shift model would.
+
+    Args:
+        shifts (Iterable[dict]): Shifts, as dicts with a date and the SHIFT_FIELDS.
+
+    Returns:
+        list[str]: A problem for every shift that can't be saved, empty when all can.
+    """
+
+    problems = []
+
+    for data in shifts:
+        day_type = data.get("day_type")
+        additional_info = data.get("additional_info")
+
+        if day_type is None:
+            problems.append(f"{data['date']}: unrecognized cell {additional_info!r}")
+        elif day_type not in ShiftDayType.values:
+            problems.append(f"{data['date']}: unknown day type {day_type!r}")
+        elif additional_info is not None and len(additional_info) > ADDITIONAL_INFO_MAX_LENGTH:
+            problems.append(
+                f"{data['date']}: {additional_info!r} is longer than "
+                f"{ADDITIONAL_INFO_MAX_LENGTH} characters"
+            )
+
+    return problems
+
+
+def match_users(employees: Iterable[Employee]) -> dict[tuple[str, str], int | None]:
+    """Finds the users of parsed employees by first and last name, in a single query.
+
+    Args:
+        employees (Iterable[Employee]): Parsed employees.
+
+    Returns:
+        dict[tuple[str, str], int | None]: User id for every (first name, last name),
+            None when no user or more than one user has the name.
+    """
+
+    names = {(employee.first_name, employee.last_name) for employee in employees}
+    if not names:
+        return {}
+
+    users = User.objects.filter(last_name__in={last_name for _, last_name in names})
+
+    matches: dict[tuple[str, str], list[int]] = {name: [] for name in names}
+    for user_id, first_name, last_name in users.values_list("id", "first_name", "last_name"):
+        if (first_name, last_name) in matches:
+            matches[(first_name, last_name)].append(user_id)
+
+    return {name: ids[0] if len(ids) == 1 else None for name, ids in matches.items()}
+
+
+def import_employees(employees: list[Employee], batch_size: int = 50) -> ImportResult:
+    """Saves the schedules of parsed employees, matching them to users by name.
+
+    Args:
+        employees (list[Employee]): Employees from `ScheduleParser.full_schedule`.
+        batch_size (int, optional): Schedules saved per transaction. Defaults to 50.
+
+    Returns:
+        ImportResult: What was matched and written.
+    """
+
+    user_ids = match_users(employees)
+    result = ImportResult()
+    schedules: dict[ScheduleKey, list[dict]] = {}
+
+    for employee in employees:
+        employee_string = f"{employee.first_name} {employee.last_name}"
+        user_id = user_ids[(employee.first_name, employee.last_name)]
+
+        if user_id is None:
+            result.unmatched.append(employee_string)
+            continue
+
+        schedule = employee.schedule
+        # not asdict(), its deep copies take longer than the database writes
+        shifts = [
+            {name: getattr(shift, name) for name in ("date", *SHIFT_FIELDS)}
+            for shift in schedule.shifts
+        ]
+
+        # checked before anything is written, so a bad cell doesn't leave a partial import
+        problems = validate_shifts(shifts)
+        if problems:
+            result.invalid[employee_string] = problems
+            continue
+
+        result.matched.append(employee_string)
+        schedules[(user_id, schedule.year, schedule.month)] = shifts
+
+    save_schedules(schedules, batch_size, result)
+
+    return result
+
+
+def save_schedules(
+    schedules: dict[ScheduleKey, list[dict]],
+    batch_size: int = 50,
+    result: ImportResult | None = None,
+    max_attempts: int = 5,
+) -> ImportResult:
+    """Creates or updates schedules and their shifts, safe to run concurrently.
+
+    Schedules are written in batches, each in its own transaction. A batch locks its
+    schedule rows with SELECT ... FOR UPDATE in (user, year, month) order, so imports
+    touching the same schedules wait for each other instead of deadlocking and imports of
+    different schedules don't block at all. The unique constraints on (user, year, month)
+    and (schedule, date) rule out duplicates, a batch that still hits a conflict, a
+    deadlock or a lock timeout is retried with a backoff. Other database errors aren't.
+
+    Args:
+        schedules (dict[ScheduleKey, list[dict]]): Shifts, as dicts with a date and the
+            SHIFT_FIELDS, of every (user id, year, month). Existing shifts are matched
+            by date.
+        batch_size (int, optional): Schedules saved per transaction. Defaults to 50.
+        result (ImportResult | None, optional): Result to add the counts to.
+        max_attempts (int, optional): Attempts per batch. Defaults to 5.
+
+    Returns:
+        ImportResult: The counts of what was written.
+
+    Raises:
+        InvalidShifts: If a shift can't be saved, nothing is written then.
+    """
+
+    problems = [
+        f"{key}: {problem}"
+        for key, shifts in schedules.items()
+        for problem in validate_shifts(shifts)
+    ]
+    if problems:
+        raise InvalidShifts("; ".join(problems))
+
+    result = result or ImportResult()
+    keys = sorted(schedules)
+
+    # retrying only makes sense when the batch is the whole transaction
+    if transaction.get_connection().in_atomic_block:
+        max_attempts = 1
+
+    for start in range(0, len(keys), batch_size):
+        batch = {key: schedules[key] for key in keys[start : start + batch_size]}
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                with transaction.atomic():
+                    counts = _save_batch(batch)
+                break
+
+            except (IntegrityError, OperationalError) as error:
+                if attempt == max_attempts or not _is_conflict(error):
+                    raise
+
+                result.retries += 1
+                logger.info("Retrying an import batch after a conflict", exc_info=True)
+                time.sleep(random.uniform(0.5, 1.5) * 0.05 * 2**attempt)
+
+        result.schedules_created += counts[0]
+        result.shifts_created += counts[1]
+        result.shifts_updated += counts[2]
+
+    return result
+
+
+def _is_conflict(error: IntegrityError | OperationalError) -> bool:
+    """Tells lock conflicts, deadlocks and unique violations from other database errors."""
+
+    cause = error.__cause__
+    code = getattr(cause, "args", (None,))[0] if cause is not None else None
+
+    if isinstance(code, int):
+        return code in MYSQL_CONFLICT_CODES
+
+    if getattr(cause, "pgcode", None):
+        return cause.pgcode in POSTGRESQL_CONFLICT_CODES  # type: ignore[union-attr]
+
+    # SQLite only has the message
+    message = str(error)
+    return "database is locked" in message or "UNIQUE constraint failed" in message
+
+
+def _save_batch(batch: dict[ScheduleKey, list[dict]]) -> tuple[int, int, int]:
+    keys = list(batch)
+    query = Q()
+    for user_id, year, month in keys:
+        query |= Q(user_id=user_id, year=year, month=month)
+
+    existing = set(EmployeeSchedule.objects.filter(query).values_list("user_id", "year", "month"))
+    missing = [key for key in keys if key not in existing]
+
+    # rows inserted by a concurrent import in the meantime are skipped, not duplicated
+    EmployeeSchedule.objects.bulk_create(
+        [
+            EmployeeSchedule(user_id=user_id, year=year, month=month)
+            for user_id, year, month in missing
+        ],
+        ignore_conflicts=True,
+    )
+
+    locked = {
+        (schedule.user_id, schedule.year, schedule.month): schedule
+        for schedule in EmployeeSchedule.objects.select_for_update()
+        .filter(query)
+        .order_by("user_id", "year", "month")
+    }
+
+    for schedule in locked.values():
+        if schedule.archived:
+            restore_schedule(schedule)
+
+    schedule_ids = [schedule.id for schedule in locked.values()]
+    current_shifts = {
+        (shift.schedule_id, shift.date): shift
+        for shift in Shift.objects.filter(schedule__in=schedule_ids)
+    }
+
+    now = timezone.now()
+    to_create: list[Shift] = []
+    to_update: list[Shift] = []
+    changed: set[int] = set()
+
+    for key, shifts in batch.items():
+        schedule = locked[key]
+
+        for data in shifts:
+            date = data["date"]
+            shift = current_shifts.get((schedule.id, date))
+
+            if shift is None:
+                to_create.append(
+                    Shift(schedule=schedule, date=date, **{f: data.get(f) for f in SHIFT_FIELDS})
+                )
+                changed.add(schedule.id)
+
+            elif any(getattr(shift, f) != data.get(f) for f in SHIFT_FIELDS):
+                for f in SHIFT_FIELDS:
+                    setattr(shift, f, data.get(f))
+                # auto_now isn't applied by bulk_update
+                shift.modified_at = now
+                to_update.append(shift)
+                changed.add(schedule.id)
+
+    Shift.objects.bulk_create(to_create, batch_size=500)
+    Shift.objects.bulk_update(to_update, [*SHIFT_FIELDS, "modified_at"], batch_size=500)
+
+    # bulk operations don't send signals, so delta sync and push are updated here
+    EmployeeSchedule.objects.filter(pk__in=changed).update(modified_at=now)
+    for key, schedule in locked.items():
+        if schedule.id in changed or key in missing:
+            publish_schedule_event(schedule, "created" if key in missing else "updated")
+
+    return len(missing), len(to_create), len(to_update)
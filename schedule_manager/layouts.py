@@ -0,0 +1,253 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+import datetime
+import hashlib
+import math
+import numbers
+import re
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# (time_start, time_end, day_type, additional_info) of a cell, see `LayoutProfile.parse_cell`
+ParsedCell = tuple[str | None, str | None, str | None, str | None]
+
+# "8", "8:00" or "08:00"
+_TIME = r"\d{1,2}(?::\d{2})?"
+
+
+class UnknownLayout(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CellRule:
+    """A form of schedule cell, e.g. "8:00-16:00" for a WORK shift.
+
+    Attributes:
+        pattern (str): Regular expression the whole stripped cell has to match. Its
+            `start` and `end` groups, if any, are the times of the shift.
+        day_type (str | None): Type of the day the cell stands for.
+        additional_info (str | None): Extra info stored with the shift, e.g. 'MC'.
+    """
+
+    pattern: str
+    day_type: str | None
+    additional_info: str | None = None
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_regex", re.compile(self.pattern))
+
+    def match(self, string: str) -> ParsedCell | None:
+        match = self._regex.fullmatch(string)  # type: ignore[attr-defined]
+        if match is None:
+            return None
+
+        groups = match.groupdict()
+        return (groups.get("start"), groups.get("end"), self.day_type, self.additional_info)
+
+
+@dataclass(frozen=True)
+class LayoutProfile:
+    """Describes where the data is in a schedule sheet and how its cells are written.
+
+    Row and column indices are positions in the sheet, counted from 0. The month of the
+    schedule is the date in the first cell of the sheet.
+
+    Attributes:
+        name (str): Name of the profile.
+        header_rows (int): Number of rows above the first employee (or section marker).
+        day_row (int): Row of the header with the days of the month.
+        name_column (int): Column with the employees' full names.
+        first_day_column (int): First column of the days, the columns between the names
+            and the days (e.g. the contract type) are skipped.
+        section_markers (frozenset[str]): Rows of the name column that group the
+            employees (e.g. "FULL TIME") and aren't employees themselves.
+        cell_rules (tuple[CellRule, ...]): Forms of cells, tried in order. A cell matching
+            none of them is stored as additional info of a shift without a day type.
+    """
+
+    name: str
+    header_rows: int
+    day_row: int
+    name_column: int
+    first_day_column: int
+    section_markers: frozenset[str] = frozenset()
+    cell_rules: tuple[CellRule, ...] = field(default_factory=tuple)
+
+    def parse_cell(self, string: str) -> ParsedCell:
+        """Parses a cell string to extract shift details.
+
+        Args:
+            string (str): Cell content from the schedule table.
+
+        Returns:
+            tuple:
+                time_start (str | None): Start time of the shift.
+                time_end (str | None): End time of the shift.
+                day_type (str | None): Type of the day (e.g., 'WORK', 'OFF').
+                additional_info (str | None): Extra info like 'MC' or unknown content.
+        """
+
+        stripped = string.strip()
+        for rule in self.cell_rules:
+            parsed = rule.match(stripped)
+            if parsed is not None:
+                return parsed
+
+        return (None, None, None, string)
+
+    def matches(self, rows: list[list]) -> bool:
+        """Checks whether the first rows of a sheet are laid out as the profile expects.
+
+        Args:
+            rows (list[list]): Rows of the sheet, at least the header and a few more.
+
+        Returns:
+            bool: True when the first cell is the month, the day row numbers the days
+                from 1 on and the name column has a section marker or a full name
+                right under the header.
+        """
+
+        if len(rows) <= self.header_rows or len(rows[0]) <= self.first_day_column:
+            return False
+
+        if not _is_date(rows[0][0]):
+            return False
+
+        days = [
+            int(cell) for cell in rows[self.day_row][self.first_day_column :] if _is_number(cell)
+        ]
+        if not days or days != list(range(1, len(days) + 1)):
+            return False
+
+        first = rows[self.header_rows][self.name_column]
+        return isinstance(first, str) and (first in self.section_markers or " " in first.strip())
+
+
+DEFAULT_LAYOUT = LayoutProfile(
+    name="default",
+    # month, weekday names, days of the month
+    header_rows=3,
+    day_row=2,
+    name_column=0,
+    # skipping the contract type ("Etat") column
+    first_day_column=2,
+    section_markers=frozenset(
+        ("FULL TIME", "PART TIME 3/4", "PART TIME 1/2", "PART TIME 1/4", "INSTRUKTORZY")
+    ),
+    cell_rules=(
+        CellRule(r"OFF", "AVAILABILITY_OFF"),
+        CellRule(r"W", "NON_WORKING_DAY"),
+        CellRule(rf"(?P<start>{_TIME})?\s*U\s*(?P<end>{_TIME})?", "VACATION"),
+        CellRule(rf"(?P<start>{_TIME})\s*-\s*(?P<end>{_TIME})", "WORK"),
+        CellRule(rf"(?P<start>{_TIME})\s*MC\s*(?P<end>{_TIME})", "WORK", "MC"),
+    ),
+)
+
+# profiles tried by `detect_layout`, in order
+LAYOUTS: dict[str, LayoutProfile] = {DEFAULT_LAYOUT.name: DEFAULT_LAYOUT}
+
+# header fingerprint -> name of the profile detected for it, per process
+_detected: dict[str, str] = {}
+
+
+def register_layout(profile: LayoutProfile) -> None:
+    """Adds a profile to the ones tried by `detect_layout`, replacing one of the same name."""
+
+    LAYOUTS[profile.name] = profile
+    _detected.clear()
+
+
+def get_layout(name: str) -> LayoutProfile:
+    try:
+        return LAYOUTS[name]
+    except KeyError:
+        raise UnknownLayout(f"There is no layout profile named {name!r}.")
+
+
+def _is_date(value) -> bool:
+    return isinstance(value, (datetime.date, datetime.datetime))
+
+
+def _is_number(value) -> bool:
+    return (
+        isinstance(value, numbers.Number)
+        and not isinstance(value, bool)
+        and not math.isnan(value)  # type: ignore[arg-type]
+    )
+
+
+def header_fingerprint(rows: list[list]) -> str:
+    """Fingerprints the header region of a sheet, the same for every month of a template.
+
+    Dates and numbers are replaced by their kind. Kinds repeated in a row (the days of
+    the month and their weekday names) shift with the weekday the month starts on, so
+    only their set counts; the other cells keep their column.
+
+    Args:
+        rows (list[list]): Header rows of the sheet.
+
+    Returns:
+        str: Hex digest of the header region.
+    """
+
+    normalized = []
+    for row in rows:
+        columns: dict[str, list[int]] = {}
+        for column, cell in enumerate(row):
+            if _is_date(cell):
+                kind = "<date>"
+            elif _is_number(cell):
+                kind = "<number>"
+            elif isinstance(cell, str) and cell.strip():
+                kind = cell.strip()
+            else:
+                continue
+            columns.setdefault(kind, []).append(column)
+
+        normalized.append(
+            sorted(
+                (kind, positions[0] if len(positions) == 1 else None)
+                for kind, positions in columns.items()
+            )
+        )
+
+    return hashlib.sha1(repr(normalized).encode()).hexdigest()
+
+
+def detect_layout(df: pd.DataFrame) -> LayoutProfile:
+    """Finds the layout profile of a sheet.
+
+    The header region is fingerprinted and the profile found for a fingerprint is
+    cached, so later sheets made from the same template are checked against that
+    profile first and skip trying the others.
+
+    Args:
+        df (pd.DataFrame): Sheet as loaded by `pd.read_excel(..., header=None)`.
+
+    Returns:
+        LayoutProfile: The first registered profile matching the sheet.
+
+    Raises:
+        UnknownLayout: If no registered profile matches the sheet.
+    """
+
+    scanned_rows = max(profile.header_rows for profile in LAYOUTS.values()) + 1
+    rows = df.iloc[:scanned_rows].to_numpy().tolist()
+    fingerprint = header_fingerprint(rows[:-1])
+
+    name = _detected.get(fingerprint)
+    if name in LAYOUTS and LAYOUTS[name].matches(rows):
+        return LAYOUTS[name]
+
+    for profile in LAYOUTS.values():
+        if profile.matches(rows):
+            _detected[fingerprint] = profile.name
+            return profile
+
+    raise UnknownLayout(
+        f"The sheet doesn't match any known layout, expected one of: {', '.join(LAYOUTS)}."
+    )
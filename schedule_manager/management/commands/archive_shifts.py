@@ -0,0 +1,69 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from schedule_manager.archive import archive_schedule, restore_schedule
+from schedule_manager.models import EmployeeSchedule
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves shifts of closed months out of the Shift table into packed archives. "
+        "Archived schedules are still served by the API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=12,
+            help="archive months that ended at least this many months ago (default: 12)",
+        )
+        parser.add_argument(
+            "--restore",
+            metavar="YYYY-MM",
+            help="move the archived shifts of the given month back into the Shift table",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            try:
+                year, month = map(int, options["restore"].split("-"))
+            except ValueError:
+                raise CommandError("--restore expects a month in the YYYY-MM format")
+
+            schedules = EmployeeSchedule.objects.filter(year=year, month=month, archived=True)
+            action, verb = restore_schedule, "Restored"
+
+        else:
+            if options["older_than"] < 1:
+                raise CommandError("--older-than must be at least 1, the current month is open")
+
+            # first month that is kept in the Shift table
+            today = datetime.date.today()
+            months = today.year * 12 + today.month - 1 - options["older_than"]
+            year, month = divmod(months, 12)
+            month += 1
+
+            schedules = EmployeeSchedule.objects.filter(
+                Q(year__lt=year) | Q(year=year, month__lt=month), archived=False
+            )
+            action, verb = archive_schedule, "Archived"
+
+        schedules = schedules.select_related("user").order_by("year", "month", "id")
+
+        if options["dry_run"]:
+            for schedule in schedules:
+                self.stdout.write(f"Would process {schedule}")
+            return
+
+        schedule_count = shift_count = 0
+        for schedule in schedules.iterator():
+            shift_count += action(schedule)
+            schedule_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {shift_count} shifts of {schedule_count} schedules.")
+        )
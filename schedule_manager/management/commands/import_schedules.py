@@ -0,0 +1,186 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule_manager.importer import import_employees
+from schedule_manager.layouts import LAYOUTS
+from schedule_manager.schedule_parser import Employee, ScheduleParser
+from schedule_manager.uploads import validate_workbook
+
+
+DEFAULT_STATE_FILE = ".import_schedules.json"
+
+
+def parse_workbook(path: str, layout: str | None = None) -> tuple[list[Employee], dict[str, float]]:
+    """Validates and parses a workbook, run in the worker processes.
+
+    Args:
+        path (str): Path of the workbook.
+        layout (str | None, optional): Name of the layout profile, detected when None.
+
+    Returns:
+        tuple: Parsed employees and the parser's stage timings.
+    """
+
+    with open(path, "rb") as file:
+        validate_workbook(file)
+
+    schedule_parser = ScheduleParser()
+    schedule_parser.parse(path, layout=layout)
+
+    return schedule_parser.full_schedule, schedule_parser.timings
+
+
+def _fingerprint(path: Path) -> list[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports schedule workbooks in bulk, e.g. the history of a store. Files are parsed "
+        "in a process pool and saved in batched transactions. Imported files are recorded "
+        "in a state file, so an interrupted run continues where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="+", help="workbooks, directories of workbooks or glob patterns"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="parser processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=50, help="schedules saved per transaction"
+        )
+        parser.add_argument(
+            "--state-file",
+            type=Path,
+            default=Path(DEFAULT_STATE_FILE),
+            help=f"where imported files are recorded (default: {DEFAULT_STATE_FILE})",
+        )
+        parser.add_argument(
+            "--layout",
+            choices=sorted(LAYOUTS),
+            help="layout profile of the workbooks (default: detected from every header)",
+        )
+        parser.add_argument(
+            "--restart", action="store_true", help="import every file again, ignore the state"
+        )
+
+    def handle(self, *args, **options):
+        files = self.find_files(options["paths"])
+        if not files:
+            raise CommandError("No .xlsx files found.")
+
+        state_file: Path = options["state_file"]
+        state = {}
+        if state_file.exists() and not options["restart"]:
+            state = json.loads(state_file.read_text())
+
+        pending = [path for path in files if state.get(str(path)) != _fingerprint(path)]
+        skipped = len(files) - len(pending)
+        if skipped:
+            self.stdout.write(f"Skipping {skipped} files imported by a previous run.")
+
+        failed = []
+        totals = {"matched": 0, "unmatched": 0, "invalid": 0, "shifts": 0}
+
+        with ProcessPoolExecutor(max_workers=max(options["workers"], 1)) as executor:
+            futures = {
+                executor.submit(parse_workbook, str(path), options["layout"]): path
+                for path in pending
+            }
+
+            try:
+                for future in as_completed(futures):
+                    path = futures[future]
+
+                    try:
+                        employees, timings = future.result()
+
+                    except Exception as error:
+                        # a broken file shouldn't stop the rest of the history
+                        failed.append(path)
+                        self.stderr.write(f"{path.name}: could not be parsed ({error})")
+                        continue
+
+                    save_start = time.perf_counter()
+                    try:
+                        result = import_employees(employees, options["batch_size"])
+
+                    except Exception as error:
+                        # not recorded in the state, so the next run tries it again
+                        failed.append(path)
+                        self.stderr.write(f"{path.name}: could not be saved ({error})")
+                        continue
+
+                    save_time = time.perf_counter() - save_start
+
+                    # written after every file, so an interrupted run loses at most one
+                    state[str(path)] = _fingerprint(path)
+                    self.write_state(state_file, state)
+
+                    shifts = result.shifts_created + result.shifts_updated
+                    totals["matched"] += len(result.matched)
+                    totals["unmatched"] += len(result.unmatched)
+                    totals["invalid"] += len(result.invalid)
+                    totals["shifts"] += shifts
+
+                    self.stdout.write(
+                        f"{path.name}: {len(result.matched)} employees matched, "
+                        f"{len(result.unmatched)} unmatched, {len(result.invalid)} invalid, "
+                        f"{result.shifts_created} shifts created, {result.shifts_updated} updated "
+                        f"(parse {sum(timings.values()):.2f}s, save {save_time:.2f}s)"
+                    )
+                    if result.unmatched and options["verbosity"] > 1:
+                        self.stdout.write(f"  unmatched: {', '.join(result.unmatched)}")
+                    for employee, problems in result.invalid.items():
+                        self.stderr.write(f"  {employee} not saved: {', '.join(problems)}")
+
+            except KeyboardInterrupt:
+                executor.shutdown(cancel_futures=True)
+                raise CommandError("Interrupted, run the command again to continue.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {len(pending) - len(failed)} files: {totals['matched']} schedules "
+                f"matched, {totals['unmatched']} unmatched, {totals['invalid']} invalid, "
+                f"{totals['shifts']} shifts written."
+            )
+        )
+
+        if failed:
+            raise CommandError(f"{len(failed)} files failed: {', '.join(p.name for p in failed)}")
+
+    def find_files(self, paths: list[str]) -> list[Path]:
+        files = set()
+
+        for pattern in paths:
+            for match in glob.glob(os.path.expanduser(pattern), recursive=True) or [pattern]:
+                path = Path(match)
+
+                if path.is_dir():
+                    # skipping the lock files Excel leaves next to open workbooks
+                    files.update(
+                        file for file in path.glob("*.xlsx") if not file.name.startswith("~$")
+                    )
+                elif path.suffix.lower() == ".xlsx" and path.is_file():
+                    files.add(path)
+                else:
+                    self.stderr.write(f"Ignoring {match}")
+
+        return sorted(file.resolve() for file in files)
+
+    def write_state(self, state_file: Path, state: dict) -> None:
+        temporary = state_file.with_suffix(".tmp")
+        temporary.write_text(json.dumps(state, indent=4))
+        os.replace(temporary, state_file)
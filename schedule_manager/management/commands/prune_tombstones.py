@@ -0,0 +1,20 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from schedule_manager.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes delta sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Clients with "
+        "an older cursor get a full sync instead."
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones"))
@@ -0,0 +1,61 @@
+import random
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Command(BaseCommand):
+    help = (
+        "Waits until the database accepts connections, retrying with an exponential "
+        "backoff. With --migrate, pending migrations are applied afterwards, in the same "
+        "process, and nothing is done when there are none."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="seconds to wait before giving up (default: 60)",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--migrate", action="store_true", help="apply pending migrations once ready"
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        start = time.monotonic()
+        delay = 0.1
+
+        while True:
+            try:
+                connection.ensure_connection()
+                break
+
+            except OperationalError as error:
+                elapsed = time.monotonic() - start
+                if elapsed >= options["timeout"]:
+                    raise CommandError(f"Database unavailable after {elapsed:.1f}s: {error}")
+
+                self.stdout.write(f"Database unavailable, retrying in {delay:.1f}s")
+                time.sleep(min(delay, options["timeout"] - elapsed))
+                delay = min(delay * 2, 5) * random.uniform(0.8, 1.2)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Database ready after {time.monotonic() - start:.1f}s")
+        )
+
+        if not options["migrate"]:
+            return
+
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+        if plan:
+            call_command("migrate", database=options["database"])
+        else:
+            self.stdout.write("No migrations to apply.")
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("schedule_manager", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employeeschedule",
+            name="archived",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="ShiftArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("shift_count", models.IntegerField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "schedule",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="schedule_manager.employeeschedule",
+                    ),
+                ),
+            ],
+        ),
+    ]
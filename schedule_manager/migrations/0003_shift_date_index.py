@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("schedule_manager", "0002_shift_archive"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="shift",
+            name="date",
+            field=models.DateField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("schedule_manager", "0003_shift_date_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("SCHEDULE", "Schedule"), ("SHIFT", "Shift")],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="employeeschedule",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="shift",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="employeeschedule",
+            index=models.Index(
+                fields=["user", "modified_at"], name="schedule_ma_user_id_2fde92_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(
+                fields=["schedule", "modified_at"],
+                name="schedule_ma_schedul_adae74_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["user", "deleted_at"], name="schedule_ma_user_id_7776af_idx"
+            ),
+        ),
+    ]
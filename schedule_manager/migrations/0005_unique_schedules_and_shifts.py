@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:05
+
+import datetime
+import json
+import zlib
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def minutes_to_time(minutes):
+    return None if minutes is None else datetime.time(*divmod(minutes, 60))
+
+
+def unpack_archive(Shift, archive):
+    """Rebuilds the Shift rows of a ShiftArchive, as `archive.unpack_shifts` reads them."""
+
+    schedule = archive.schedule
+    day_types = [value for value, _ in Shift._meta.get_field("day_type").choices]
+    packed = json.loads(zlib.decompress(archive.data))
+
+    return [
+        Shift(
+            id=shift_id,
+            schedule=schedule,
+            date=datetime.date(schedule.year, schedule.month, day),
+            time_start=minutes_to_time(time_start),
+            time_end=minutes_to_time(time_end),
+            day_type=day_types[day_type],
+            additional_info=additional_info,
+        )
+        for shift_id, day, time_start, time_end, day_type, additional_info in packed["shifts"]
+    ]
+
+
+def remove_duplicates(apps, schema_editor):
+    """Merges duplicated schedules and drops duplicated shifts before the constraints.
+
+    Of the schedules of the same user and month the oldest one is kept and gets the shifts
+    of the others. Archived schedules among them are restored first, so no shifts are
+    lost with a deleted archive and the kept schedule ends up live; it can be archived
+    again from the admin. Of the shifts of the same day the latest one is kept.
+    """
+
+    EmployeeSchedule = apps.get_model("schedule_manager", "EmployeeSchedule")
+    Shift = apps.get_model("schedule_manager", "Shift")
+    ShiftArchive = apps.get_model("schedule_manager", "ShiftArchive")
+
+    duplicated_schedules = (
+        EmployeeSchedule.objects.values("user", "year", "month")
+        .annotate(count=Count("id"), keep=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicated_schedules:
+        schedules = EmployeeSchedule.objects.filter(
+            user=duplicate["user"], year=duplicate["year"], month=duplicate["month"]
+        )
+
+        archives = ShiftArchive.objects.filter(schedule__in=schedules).select_related("schedule")
+        for archive in archives:
+            Shift.objects.bulk_create(unpack_archive(Shift, archive))
+        archives.delete()
+        schedules.update(archived=False)
+
+        others = schedules.exclude(pk=duplicate["keep"])
+        Shift.objects.filter(schedule__in=others).update(schedule=duplicate["keep"])
+        others.delete()
+
+    duplicated_shifts = (
+        Shift.objects.values("schedule", "date")
+        .annotate(count=Count("id"), keep=Max("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicated_shifts:
+        Shift.objects.filter(schedule=duplicate["schedule"], date=duplicate["date"]).exclude(
+            pk=duplicate["keep"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("schedule_manager", "0004_sync_tracking"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="employeeschedule",
+            constraint=models.UniqueConstraint(
+                fields=("user", "year", "month"), name="unique_schedule_per_user_month"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="shift",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "date"), name="unique_shift_per_day"
+            ),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -17,20 +17,110 @@ class EmployeeSchedule(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     month = models.IntegerField()
     year = models.IntegerField()
+    # shifts of archived schedules live packed in ShiftArchive instead of the Shift table
+    archived = models.BooleanField(default=False)
+    # also bumped whenever one of the shifts changes, see signals.py
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "modified_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "year", "month"], name="unique_schedule_per_user_month"
+            )
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.month}/{self.year}"
 
+    def get_shifts(self):
+        """Returns the shifts of the schedule, unpacking them from the archive if needed.
+
+        Archived shifts are unsaved Shift instances with their original ids.
+        """
+
+        if self.archived:
+            return self.shiftarchive.unpack()
+
+        return Shift.objects.filter(schedule=self)
+
+
+class ShiftQuerySet(models.QuerySet):
+    def delete(self):
+        """Deletes the shifts, recording the deletions for delta sync in bulk.
+
+        Not done with delete signals, which would make Django load and delete every
+        shift one by one.
+        """
+
+        from .signals import record_shift_deletions
+
+        with transaction.atomic(using=self.db):
+            record_shift_deletions(self)
+            return super().delete()
+
 
 class Shift(models.Model):
     schedule = models.ForeignKey(EmployeeSchedule, on_delete=models.CASCADE)
-    date = models.DateField()
+    date = models.DateField(db_index=True)
     time_start = models.TimeField(null=True, blank=True)
     time_end = models.TimeField(null=True, blank=True)
     day_type = models.CharField(
         max_length=20, choices=ShiftDayType.choices, default=ShiftDayType.NON_WORKING_DAY
     )
     additional_info = models.CharField(max_length=20, null=True, blank=True)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    objects = ShiftQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["schedule", "modified_at"])]
+        constraints = [
+            models.UniqueConstraint(fields=["schedule", "date"], name="unique_shift_per_day")
+        ]
 
     def __str__(self):
         return f"{self.schedule.user} | {self.date} | {self.day_type}"
+
+    def delete(self, *args, **kwargs):
+        from .signals import record_shift_deletions
+
+        with transaction.atomic(using=kwargs.get("using")):
+            record_shift_deletions(Shift.objects.filter(pk=self.pk))
+            return super().delete(*args, **kwargs)
+
+
+class ShiftArchive(models.Model):
+    """Packed shifts of a schedule moved out of the Shift table by `archive_shifts`."""
+
+    schedule = models.OneToOneField(EmployeeSchedule, on_delete=models.CASCADE)
+    data = models.BinaryField()
+    shift_count = models.IntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.schedule} ({self.shift_count} shifts)"
+
+    def unpack(self) -> list[Shift]:
+        from .archive import unpack_shifts
+
+        return unpack_shifts(self.data, self.schedule)
+
+
+class Tombstone(models.Model):
+    """Records a deleted schedule or shift, so delta sync can tell clients to drop it."""
+
+    class Kind(models.TextChoices):
+        SCHEDULE = "SCHEDULE", "Schedule"
+        SHIFT = "SHIFT", "Shift"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "deleted_at"])]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} of {self.user}"
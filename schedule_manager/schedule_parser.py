@@ -1,7 +1,17 @@
-import pandas as pd
+from __future__ import annotations
 from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, BinaryIO
 import datetime
-from io import BytesIO
+import os
+import time
+
+from .layouts import LayoutProfile, UnknownLayout, _is_date, detect_layout, get_layout
+
+# pandas (and NumPy with it) is imported on first use, so loading the admin doesn't
+# pull the whole parsing stack into every worker
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass
@@ -65,57 +75,60 @@ class ScheduleParser:
         """Initializes the parser with an empty employee schedule list."""
 
         self.full_schedule: list[Employee] = []
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def _timed(self, stage: str):
+        """Measures the wall time of a parsing stage and stores it in `self.timings`.
+
+        Args:
+            stage (str): Name of the stage (e.g., 'read_excel', 'prepare', 'extract').
+        """
 
-    def _prepare_dataframe(self, file: BytesIO, employee_names_col_index: int = 0) -> None:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = time.perf_counter() - start
+
+    def _prepare_dataframe(self, df: pd.DataFrame, layout: LayoutProfile) -> None:
         """
-        Loads and cleans an Excel sheet into a DataFrame for processing.
+        Cleans a raw Excel sheet DataFrame for processing.
 
-        Sets the year and month, renames columns, sets employee names as index,
-        and removes unnecessary rows and columns.
+        Sets the year and month, keeps only the days of the month and the employees'
+        rows, with their names as the index.
 
         Args:
-            file (BytesIO): In-memory Excel file.
-            employee_names_col_index (int, optional): Index of the column containing
-                employee names to be used as the DataFrame index. Defaults to 0.
+            df (pd.DataFrame): Sheet as loaded by `pd.read_excel(..., header=None)`.
+            layout (LayoutProfile): Layout of the sheet.
 
         Sets:
-            self._df (pd.DataFrame): Processed schedule data.
+            self._df (pd.DataFrame): Processed schedule data, the days of the month in
+                the first row.
             self.year (int): Year extracted from the sheet header.
             self.month (int): Month extracted from the sheet header.
+
+        Raises:
+            UnknownLayout: If the first cell of the sheet isn't a date.
         """
 
-        df = pd.read_excel(file)
+        # an explicit layout skips `LayoutProfile.matches`, the month is checked here
+        if not _is_date(df.iat[0, 0]):
+            raise UnknownLayout(
+                f"The first cell of the sheet should be the month of the schedule, "
+                f"got {df.iat[0, 0]!r}."
+            )
 
         # store year and month for later
-        self.year: int = df.iloc[:, 0].name.year  # type: ignore
-        self.month: int = df.iloc[:, 0].name.month  # type: ignore
-
-        # set the first row as column names
-        df = df.rename(
-            {
-                old_name: new_name
-                for old_name, new_name in zip(df.columns.to_list(), df.iloc[0].to_list())
-            },
-            axis="columns",
-        ).iloc[1:]
-
-        # rename first index from "NaN" to "DAY_OF_THE_MONTH"
-        df.iloc[0, 0] = "DAY_OF_THE_MONTH"
-
-        # turn the column containing employees' names into the index
-        df = df.set_index(df.iloc[:, employee_names_col_index]).drop(
-            columns=df.columns[employee_names_col_index]
-        )
-
-        # drop emtpy rows and column
-        df = df.drop(
-            ["FULL TIME", "PART TIME 3/4", "PART TIME 1/2", "PART TIME 1/4", "INSTRUKTORZY"]
-        )
-
-        # if the first column name is NaN df.drop won't work,
-        # so I fillna with random values to prevent that from happening
-        df.columns = df.columns.fillna("peekaboo")
-        df = df.drop(df.columns[0], axis=1)
+        self.year: int = df.iat[0, 0].year
+        self.month: int = df.iat[0, 0].month
+
+        # section markers and empty rows aren't employees
+        names = df.iloc[layout.header_rows :, layout.name_column]
+        names = names[names.notna() & ~names.isin(layout.section_markers)]
+
+        df = df.iloc[[layout.day_row, *names.index], layout.first_day_column :]
+        df.index = ["DAY_OF_THE_MONTH", *names.to_list()]
 
         self._df = df
 
@@ -134,42 +147,6 @@ class ScheduleParser:
             for employee in employee_names
         ]
 
-    def _parse_workday_string(
-        self, string: str
-    ) -> tuple[str | None, str | None, str | None, str | None]:
-        """Parses a cell string to extract shift details.
-
-        Args:
-            string (str): Cell content from the schedule table.
-
-        Returns:
-            tuple:
-                time_start (str | None): Start time of the shift.
-                time_end (str | None): End time of the shift.
-                day_type (str | None): Type of the day (e.g., 'WORK', 'OFF').
-                additional_info (str | None): Extra info like 'MC' or unknown content.
-        """
-
-        if string.strip() == "OFF":
-            return (None, None, "AVAILABILITY_OFF", None)
-
-        if string.strip() == "W":
-            return (None, None, "NON_WORKING_DAY", None)
-
-        if "U" in string:
-            time_start, time_end = string.split("U")
-            return (time_start.strip(), time_end.strip(), "VACATION", None)
-
-        if "-" in string:
-            time_start, time_end = string.split("-")
-            return (time_start.strip(), time_end.strip(), "WORK", None)
-
-        if "MC" in string:
-            time_start, time_end = string.split("MC")
-            return (time_start.strip(), time_end.strip(), "WORK", "MC")
-
-        return (None, None, None, string)
-
     def _parse_time_string(self, time: str | None) -> datetime.time | None:
         """Parses a string into a time object.
 
@@ -192,45 +169,84 @@ class ScheduleParser:
         with Shift objects based on the corresponding day and cell content.
         """
 
+        import pandas as pd
+
+        rows = self._df.to_numpy()
         first_column: int = 0
-        days_of_month: list[int] = [int(x) if not pd.isna(x) else -1 for x in self._df.iloc[0]]
+        dates: list[datetime.date | None] = [
+            datetime.date(self.year, self.month, int(x)) if not pd.isna(x) else None
+            for x in rows[0]
+        ]
+        # a sheet has only a handful of distinct cells, each is parsed once
+        parsed: dict[str, tuple] = {}
 
-        for index in range(len(self._df) - 1):
+        for index, row in enumerate(rows[1:]):
+            shifts = self.full_schedule[index].schedule.shifts
 
-            for column in range(first_column, len(self._df.columns)):
+            for column in range(first_column, len(row)):
 
-                cell = self._df.iloc[index + 1, column]
+                cell = row[column]
                 # if cell is NaN (empty) it skips entire column to do less iterations
                 # (cells are only empty for the days that are "outside" the current month)
                 if pd.isna(cell):
                     first_column = column + 1
                     continue
 
-                time_start, time_end, day_type, additional_info = self._parse_workday_string(
-                    str(cell)
-                )
+                string = str(cell)
+                if string not in parsed:
+                    time_start, time_end, day_type, additional_info = self.layout.parse_cell(string)
+                    parsed[string] = (
+                        self._parse_time_string(time_start),
+                        self._parse_time_string(time_end),
+                        day_type,
+                        additional_info,
+                    )
 
-                self.full_schedule[index].schedule.shifts.append(
+                time_start, time_end, day_type, additional_info = parsed[string]
+                shifts.append(
                     Shift(
-                        date=datetime.date(self.year, self.month, days_of_month[column]),
-                        time_start=self._parse_time_string(time_start),
-                        time_end=self._parse_time_string(time_end),
+                        date=dates[column],  # type: ignore[arg-type]
+                        time_start=time_start,
+                        time_end=time_end,
                         day_type=day_type,
                         additional_info=additional_info,
                     )
                 )
 
-    def parse(self, file: BytesIO, employee_names_col_index: int = 0) -> None:
+    def parse(
+        self, file: str | os.PathLike | BinaryIO, *, layout: LayoutProfile | str | None = None
+    ) -> None:
         """Parses an Excel schedule file and returns structured employee data.
 
+        The wall time of every stage is stored in `self.timings`.
+
         Args:
-            file (BytesIO): In-memory Excel file containing the schedule.
-            employee_names_col_index (int): Column index containing employee names.
+            file (str | os.PathLike | BinaryIO): Path of the Excel file containing the
+                schedule, or the file itself. A path lets the workbook be read straight
+                from disk instead of from a copy in memory.
+            layout (LayoutProfile | str | None, optional): Layout profile, or its name,
+                of the sheet. Detected from the sheet's header when None. Keyword-only,
+                the second positional parameter used to be the names' column index.
+
+        Raises:
+            UnknownLayout: If the layout isn't given and no profile matches the sheet, or
+                the sheet doesn't start with the month of the schedule.
         """
 
-        self._prepare_dataframe(file, employee_names_col_index)
+        import pandas as pd
+
+        with self._timed("read_excel"):
+            df = pd.read_excel(file, header=None)
+
+        with self._timed("prepare"):
+            if isinstance(layout, str):
+                layout = get_layout(layout)
+            self.layout: LayoutProfile = layout or detect_layout(df)
+
+            self._prepare_dataframe(df, self.layout)
 
-        if not self.full_schedule:
-            self._init_schedule(self._df.index.to_list()[1:])
+            if not self.full_schedule:
+                self._init_schedule(self._df.index.to_list()[1:])
 
-        self._extract_data()
+        with self._timed("extract"):
+            self._extract_data()
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import EmployeeSchedule, Shift
+from .importer import save_schedules
 
 
 class ShiftSerializer(serializers.ModelSerializer):
@@ -26,9 +27,7 @@ class EmployeeScheduleSerializer(serializers.ModelSerializer):
         shifts_data = validated_data.pop("shifts")
         user = self.context["user"]
 
-        schedule = EmployeeSchedule.objects.get_or_create(user=user, **validated_data)[0]
+        # locked and retried, so concurrent uploads of the same month don't duplicate it
+        save_schedules({(user.pk, validated_data["year"], validated_data["month"]): shifts_data})
 
-        for shift in shifts_data:
-            Shift.objects.get_or_create(schedule=schedule, **shift)
-
-        return schedule
+        return EmployeeSchedule.objects.get(user=user, **validated_data)
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .events import publish_schedule_event
+from .models import EmployeeSchedule, Shift, Tombstone
+
+
+User = get_user_model()
+
+_tracking_disabled: ContextVar[bool] = ContextVar("sync_tracking_disabled", default=False)
+
+
+@contextmanager
+def sync_tracking_disabled():
+    """Stops changes from being reported to delta sync and pushed, e.g. while archiving."""
+
+    token = _tracking_disabled.set(True)
+    try:
+        yield
+    finally:
+        _tracking_disabled.reset(token)
+
+
+def _deleted_with(origin, model) -> bool:
+    """Tells whether a delete was started on an instance or queryset of `model`."""
+
+    if isinstance(origin, models.QuerySet):
+        return issubclass(origin.model, model)
+
+    return isinstance(origin, model)
+
+
+def _publish_updated(schedule_ids) -> None:
+    for schedule in EmployeeSchedule.objects.filter(pk__in=schedule_ids):
+        publish_schedule_event(schedule, "updated")
+
+
+def _publish_updated_on_commit(schedule_id: int) -> None:
+    """Publishes an "updated" event for a schedule once per transaction, after it commits.
+
+    An edit can save many shifts of one schedule in a transaction. The schedules waiting
+    for the commit are kept on the connection together with its list of on-commit hooks,
+    which Django replaces whenever a transaction ends, so a rolled back transaction
+    leaves nothing behind.
+
+    Args:
+        schedule_id (int): Id of the changed schedule.
+    """
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _publish_updated([schedule_id])
+        return
+
+    hooks, pending = getattr(connection, "updated_schedules", (None, None))
+    if hooks is not connection.run_on_commit:
+        pending = set()
+        transaction.on_commit(lambda: _publish_updated(pending), robust=True)
+        connection.updated_schedules = (connection.run_on_commit, pending)
+
+    pending.add(schedule_id)
+
+
+@receiver(post_save, sender=Shift)
+def shift_saved(sender, instance, **kwargs):
+    if _tracking_disabled.get():
+        return
+
+    EmployeeSchedule.objects.filter(pk=instance.schedule_id).update(modified_at=timezone.now())
+    _publish_updated_on_commit(instance.schedule_id)
+
+
+@receiver(post_save, sender=EmployeeSchedule)
+def schedule_saved(sender, instance, created, **kwargs):
+    if _tracking_disabled.get():
+        return
+
+    publish_schedule_event(instance, "created" if created else "updated")
+
+
+def record_shift_deletions(shifts: models.QuerySet) -> None:
+    """Writes tombstones for shifts about to be deleted and marks their schedules changed.
+
+    Called by `Shift.delete` and `ShiftQuerySet.delete` instead of a delete signal, so
+    the work is a few bulk queries however many shifts go. Shifts deleted along with
+    their schedule or user don't pass through here, the schedule's or user's own
+    deletion covers them.
+
+    Args:
+        shifts (models.QuerySet): Shifts that are going to be deleted.
+    """
+
+    if _tracking_disabled.get():
+        return
+
+    deleted = list(shifts.values_list("pk", "schedule_id", "schedule__user_id"))
+    if not deleted:
+        return
+
+    Tombstone.objects.bulk_create(
+        [
+            Tombstone(user_id=user_id, kind=Tombstone.Kind.SHIFT, object_id=shift_id)
+            for shift_id, _, user_id in deleted
+        ]
+    )
+
+    schedules = EmployeeSchedule.objects.filter(pk__in={row[1] for row in deleted})
+    schedules.update(modified_at=timezone.now())
+    for schedule in schedules:
+        publish_schedule_event(schedule, "updated")
+
+
+@receiver(post_delete, sender=EmployeeSchedule)
+def schedule_deleted(sender, instance, origin=None, **kwargs):
+    if _tracking_disabled.get() or _deleted_with(origin, User):
+        return
+
+    Tombstone.objects.create(
+        user_id=instance.user_id, kind=Tombstone.Kind.SCHEDULE, object_id=instance.pk
+    )
+    publish_schedule_event(instance, "deleted")
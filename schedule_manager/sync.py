@@ -0,0 +1,108 @@
+import base64
+import binascii
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import EmployeeSchedule, Shift, Tombstone
+from .serializers import ShiftSerializer
+
+
+CURSOR_VERSION = "1"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime.datetime) -> str:
+    """Encodes a point in time into an opaque sync cursor."""
+
+    return base64.urlsafe_b64encode(f"{CURSOR_VERSION}:{timestamp.isoformat()}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> datetime.datetime:
+    """Decodes a cursor made by `encode_cursor`.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed, from an unknown version or its time
+            has no timezone.
+    """
+
+    try:
+        version, _, timestamp = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        if version != CURSOR_VERSION:
+            raise InvalidCursor(cursor)
+
+        decoded = datetime.datetime.fromisoformat(timestamp)
+        # cursors are made from aware times, a naive one can't be compared with them
+        if decoded.tzinfo is None:
+            raise InvalidCursor(cursor)
+
+        return decoded
+
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def changes_since(user_id: int, since: datetime.datetime | None) -> dict:
+    """Collects the schedules, shifts and deletions of a user changed after `since`.
+
+    Changes are matched with a margin of SYNC_CURSOR_OVERLAP seconds before the cursor,
+    so rows written by transactions that committed after the previous sync started are
+    not missed. Clients apply the changes idempotently, by id. Archived schedules are
+    synced like the others, with their shifts unpacked from the archive.
+
+    Args:
+        user_id (int): Id of the user.
+        since (datetime.datetime | None): Time encoded in the client's cursor, None
+            (or a time older than the tombstone retention) for a full sync.
+
+    Returns:
+        dict: The changes and the cursor to send next time. With `full` set, the client
+            should replace its local data instead of merging into it.
+    """
+
+    now = timezone.now()
+    retention = datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    full = since is None or since < now - retention
+
+    schedules = EmployeeSchedule.objects.filter(user_id=user_id)
+    shifts = Shift.objects.filter(schedule__user_id=user_id, schedule__archived=False)
+    deleted: dict[str, list[int]] = {"schedules": [], "shifts": []}
+
+    if not full:
+        since -= datetime.timedelta(seconds=settings.SYNC_CURSOR_OVERLAP)
+
+        # (user, modified_at) index, a shift change also bumps its schedule
+        schedules = schedules.filter(modified_at__gt=since)
+        shifts = shifts.filter(schedule__in=schedules, modified_at__gt=since)
+
+        tombstones = Tombstone.objects.filter(user_id=user_id, deleted_at__gt=since)
+        for kind, object_id in tombstones.values_list("kind", "object_id"):
+            deleted["schedules" if kind == Tombstone.Kind.SCHEDULE else "shifts"].append(object_id)
+
+    shifts_by_schedule = defaultdict(list)
+    for shift in shifts.order_by("date"):
+        shifts_by_schedule[shift.schedule_id].append(ShiftSerializer(shift).data)
+
+    # archived shifts aren't in the Shift table, their schedules are sent whole
+    for schedule in schedules.filter(archived=True).select_related("shiftarchive"):
+        shifts_by_schedule[schedule.id] = ShiftSerializer(schedule.get_shifts(), many=True).data
+
+    return {
+        "cursor": encode_cursor(now),
+        "full": full,
+        "schedules": [
+            {
+                "id": schedule.id,
+                "month": schedule.month,
+                "year": schedule.year,
+                "shifts": shifts_by_schedule[schedule.id],
+            }
+            for schedule in schedules.order_by("year", "month")
+        ],
+        "deleted": deleted,
+    }
@@ -1,3 +1,897 @@
-from django.test import TestCase
+import base64
+import datetime
+import random
+import subprocess
+import sys
+import threading
+import zipfile
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, router, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from benchmarks.workbooks import SECTIONS, generate_workbook
+from schedule_app import db_router
+from .archive import archive_schedule, pack_shifts, restore_schedule, unpack_shifts
+from .availability import ArchivedMonth, find_available
+from .importer import import_employees
+from . import layouts
+from .layouts import DEFAULT_LAYOUT, LayoutProfile, UnknownLayout
+from .models import EmployeeSchedule, Shift, ShiftArchive, ShiftDayType, Tombstone
+from .schedule_parser import Employee, EmployeeSchedule as ParsedSchedule, Shift as ParsedShift
+from .schedule_parser import ScheduleParser
+from .uploads import InvalidWorkbook, validate_workbook
+from .sync import InvalidCursor, changes_since, decode_cursor, encode_cursor
+
+
+class StartupImportsTest(SimpleTestCase):
+    def test_setup_does_not_import_parsing_stack(self):
+        # a fresh interpreter, since the test runner itself may have loaded pandas already
+        script = (
+            "import sys, django; django.setup();"
+            "from django.urls import get_resolver; get_resolver().url_patterns;"
+            "print(','.join(m for m in ('pandas', 'numpy', 'openpyxl') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+        self.assertEqual(output, "", f"django.setup() imported {output}")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        db_router._pinned_until_local = 0.0
+
+        token = db_router._request_pinned.set(False)
+        self.addCleanup(db_router._request_pinned.reset, token)
+
+    def test_schedule_reads_go_to_replica(self):
+        self.assertEqual(EmployeeSchedule.objects.all().db, "replica_0")
+        self.assertEqual(Shift.objects.all().db, "replica_0")
+
+    def test_auth_reads_stay_on_primary(self):
+        self.assertEqual(get_user_model().objects.all().db, "default")
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(router.db_for_write(EmployeeSchedule), "default")
+
+    def test_reads_after_write_are_pinned_to_primary(self):
+        router.db_for_write(Shift)
+
+        self.assertEqual(EmployeeSchedule.objects.all().db, "default")
+
+    def test_pin_is_shared_through_cache(self):
+        db_router.pin_primary()
+        # a new request in another worker starts unpinned, but sees the cached pin
+        db_router._request_pinned.set(False)
+
+        self.assertEqual(EmployeeSchedule.objects.all().db, "default")
+
+        cache.clear()
+        self.assertEqual(EmployeeSchedule.objects.all().db, "replica_0")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        self.assertEqual(EmployeeSchedule.objects.all().db, "default")
+
+
+class PrimaryReplicaRouterTransactionTest(TestCase):
+    @override_settings(DATABASE_REPLICAS=["replica_0"])
+    def test_reads_inside_transaction_use_primary(self):
+        with transaction.atomic():
+            self.assertEqual(EmployeeSchedule.objects.all().db, "default")
+
+
+class ConcurrentImportTest(TransactionTestCase):
+    employees = 20
+    threads = 6
+
+    def setUp(self):
+        get_user_model().objects.bulk_create(
+            get_user_model()(email=f"employee{index}@example.com", first_name="E", last_name=str(index))
+            for index in range(self.employees)
+        )
+
+    def parsed_month(self, month: int, start_hour: int) -> list[Employee]:
+        days = (datetime.date(2025, month % 12 + 1, 1) - datetime.timedelta(days=1)).day
+
+        return [
+            Employee(
+                "E",
+                str(index),
+                ParsedSchedule(
+                    month,
+                    2025,
+                    [
+                        ParsedShift(
+                            datetime.date(2025, month, day),
+                            datetime.time(start_hour),
+                            datetime.time(start_hour + 8),
+                            ShiftDayType.WORK,
+                        )
+                        for day in range(1, days + 1)
+                    ],
+                ),
+            )
+            for index in range(self.employees)
+        ]
+
+    def run_concurrently(self, workloads: list[list[Employee]]) -> list[Exception]:
+        barrier = threading.Barrier(len(workloads))
+        errors = []
+
+        def run(employees):
+            try:
+                barrier.wait()
+                import_employees(employees, batch_size=5)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(workload,)) for workload in workloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return errors
+
+    def test_overlapping_imports_do_not_duplicate(self):
+        # every thread imports the same two months, with different shift times
+        workloads = [
+            self.parsed_month(1, 6 + thread) + self.parsed_month(2, 6 + thread)
+            for thread in range(self.threads)
+        ]
+
+        self.assertEqual(self.run_concurrently(workloads), [])
+
+        self.assertEqual(EmployeeSchedule.objects.count(), self.employees * 2)
+        self.assertEqual(Shift.objects.count(), self.employees * (31 + 28))
+        self.assertFalse(
+            EmployeeSchedule.objects.values("user", "year", "month")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .exists()
+        )
+        # each schedule ends up with the shifts of a single import, not a mix
+        for schedule in EmployeeSchedule.objects.all():
+            self.assertEqual(
+                len(set(Shift.objects.filter(schedule=schedule).values_list("time_start"))), 1
+            )
+
+    def test_reimport_updates_shifts_in_place(self):
+        import_employees(self.parsed_month(3, 8))
+        ids = set(Shift.objects.values_list("id", flat=True))
+
+        result = import_employees(self.parsed_month(3, 10))
+
+        self.assertEqual(set(Shift.objects.values_list("id", flat=True)), ids)
+        self.assertEqual(result.shifts_created, 0)
+        self.assertEqual(result.shifts_updated, self.employees * 31)
+        self.assertEqual(Shift.objects.filter(time_start=datetime.time(10)).count(), len(ids))
+
+
+class AvailabilityTest(TestCase):
+    window = (datetime.time(10), datetime.time(14))
+
+    def setUp(self):
+        self.users = {}
+
+    def employee(self, last_name: str, **fields):
+        self.users[last_name] = get_user_model().objects.create(
+            email=f"{last_name}@example.com", first_name="E", last_name=last_name, **fields
+        )
+        EmployeeSchedule.objects.create(user=self.users[last_name], year=2025, month=3)
+
+        return self.users[last_name]
+
+    def shift(self, last_name, date, start=None, end=None, day_type=ShiftDayType.WORK):
+        schedule, _ = EmployeeSchedule.objects.get_or_create(
+            user=self.users[last_name], year=date.year, month=date.month
+        )
+        Shift.objects.create(
+            schedule=schedule,
+            date=date,
+            time_start=None if start is None else datetime.time(start),
+            time_end=None if end is None else datetime.time(end),
+            day_type=day_type,
+        )
+
+    def free(self, day, days=1, window=None) -> dict[str, list[datetime.date]]:
+        return {
+            employee.last_name: employee.free_days
+            for employee in find_available(day, *(window or self.window), days)
+        }
+
+    def test_overlapping_work_shifts_make_busy(self):
+        day = datetime.date(2025, 3, 10)
+        for last_name, start, end in [
+            ("morning", 6, 10),
+            ("evening", 14, 22),
+            ("inside", 11, 12),
+            ("around", 8, 16),
+            ("late", 13, 21),
+        ]:
+            self.employee(last_name)
+            self.shift(last_name, day, start, end)
+
+        self.assertEqual(set(self.free(day)), {"morning", "evening"})
+
+    def test_overnight_shift_from_previous_month(self):
+        self.employee("night")
+        self.employee("short_night")
+        self.shift("night", datetime.date(2025, 2, 28), 22, 11)
+        self.shift("short_night", datetime.date(2025, 2, 28), 22, 6)
+
+        self.assertEqual(set(self.free(datetime.date(2025, 3, 1))), {"short_night"})
+
+    def test_blocking_day_types(self):
+        day = datetime.date(2025, 3, 10)
+        for day_type in ShiftDayType.values:
+            if day_type != ShiftDayType.WORK:
+                self.employee(day_type)
+                self.shift(day_type, day, day_type=day_type)
+
+        self.assertEqual(set(self.free(day)), {ShiftDayType.NON_WORKING_DAY})
+
+    def test_only_active_employees_rostered_that_month(self):
+        self.employee("rostered")
+        self.employee("inactive", is_active=False)
+        get_user_model().objects.create(
+            email="other@example.com", first_name="E", last_name="other"
+        )
+
+        self.assertEqual(set(self.free(datetime.date(2025, 3, 10))), {"rostered"})
+
+    def test_week_across_month_end(self):
+        self.employee("busy_in_april")
+        self.shift("busy_in_april", datetime.date(2025, 4, 2), 9, 17)
+        self.shift("busy_in_april", datetime.date(2025, 3, 29), day_type=ShiftDayType.VACATION)
+
+        free_days = self.free(datetime.date(2025, 3, 28), days=7)["busy_in_april"]
+
+        expected = [datetime.date(2025, 3, 28) + datetime.timedelta(days=n) for n in range(7)]
+        expected.remove(datetime.date(2025, 3, 29))
+        expected.remove(datetime.date(2025, 4, 2))
+        self.assertEqual(free_days, expected)
+
+    def test_week_into_a_month_without_schedule(self):
+        self.employee("march_only")
+        self.employee("rostered_in_april")
+        self.shift("rostered_in_april", datetime.date(2025, 4, 10), 9, 17)
+
+        free = self.free(datetime.date(2025, 3, 28), days=7)
+
+        march = [datetime.date(2025, 3, day) for day in range(28, 32)]
+        self.assertEqual(free["march_only"], march)
+        self.assertEqual(
+            free["rostered_in_april"], [*march, *(datetime.date(2025, 4, day) for day in (1, 2, 3))]
+        )
+
+    def test_ordered_by_hours_worked_that_month(self):
+        for last_name in ("a", "b", "c"):
+            self.employee(last_name)
+        # 16 hours, 8 hours and an overnight shift of 10 hours, all before the day
+        self.shift("a", datetime.date(2025, 3, 3), 8, 16)
+        self.shift("a", datetime.date(2025, 3, 4), 8, 16)
+        self.shift("b", datetime.date(2025, 3, 3), 8, 16)
+        self.shift("c", datetime.date(2025, 3, 3), 20, 6)
+        # later and previous month shifts don't count as worked
+        self.shift("b", datetime.date(2025, 3, 20), 8, 16)
+        self.shift("b", datetime.date(2025, 2, 20), 8, 16)
+
+        employees = find_available(datetime.date(2025, 3, 10), *self.window)
+
+        self.assertEqual(
+            [(e.last_name, e.hours_worked, e.hours_scheduled) for e in employees],
+            [("b", 8, 16), ("c", 10, 10), ("a", 16, 16)],
+        )
+
+    def test_archived_month_is_rejected(self):
+        archive_schedule(self.employee("archived").employeeschedule_set.get())
+
+        with self.assertRaises(ArchivedMonth):
+            find_available(datetime.date(2025, 3, 10), *self.window)
+
+    def test_matches_interval_overlap(self):
+        rng = random.Random(0)
+        hours = [0, 2, 6, 8, 10, 12, 14, 16, 18, 20, 22]
+        day_types = [ShiftDayType.WORK] * 6 + [
+            ShiftDayType.VACATION,
+            ShiftDayType.NON_WORKING_DAY,
+            ShiftDayType.SICK_LEAVE,
+        ]
+        first = datetime.date(2025, 2, 25)
+
+        for index in range(20):
+            self.employee(f"e{index:02}")
+            for offset in range(40):
+                self.shift(
+                    f"e{index:02}",
+                    first + datetime.timedelta(days=offset),
+                    rng.choice(hours),
+                    rng.choice(hours),
+                    rng.choice(day_types),
+                )
+
+        for day, days, start, end in [
+            (datetime.date(2025, 3, 1), 7, 10, 14),
+            (datetime.date(2025, 3, 15), 3, 0, 6),
+            (datetime.date(2025, 3, 28), 7, 20, 23),
+        ]:
+            window = (datetime.time(start), datetime.time(end))
+            self.assertEqual(
+                self.free(day, days, window), self.brute_force(day, days, start, end), day
+            )
+
+    def brute_force(self, day, days, start, end) -> dict[str, list[datetime.date]]:
+        def minute(date, time):
+            return (date - day).days * 24 * 60 + time.hour * 60 + time.minute
+
+        free = {}
+        for last_name, user in self.users.items():
+            shifts = Shift.objects.filter(schedule__user=user)
+            free_days = []
+
+            for offset in range(days):
+                current = day + datetime.timedelta(days=offset)
+                window_start = offset * 24 * 60 + start * 60
+                window_end = offset * 24 * 60 + end * 60
+                busy = False
+
+                for shift in shifts:
+                    if shift.day_type == ShiftDayType.WORK:
+                        shift_start = minute(shift.date, shift.time_start)
+                        shift_end = minute(shift.date, shift.time_end)
+                        if shift_end <= shift_start:
+                            shift_end += 24 * 60
+                        busy |= shift_start < window_end and window_start < shift_end
+                    elif shift.day_type != ShiftDayType.NON_WORKING_DAY:
+                        busy |= shift.date == current
+
+                if not busy:
+                    free_days.append(current)
+
+            if free_days:
+                free[last_name] = free_days
+
+        return free
+
+
+def _previous_cell_grammar(string: str) -> tuple:
+    # the rules ScheduleParser had before layout profiles
+    if string.strip() == "OFF":
+        return (None, None, "AVAILABILITY_OFF", None)
+    if string.strip() == "W":
+        return (None, None, "NON_WORKING_DAY", None)
+    if "U" in string:
+        time_start, time_end = string.split("U")
+        return (time_start.strip(), time_end.strip(), "VACATION", None)
+    if "-" in string:
+        time_start, time_end = string.split("-")
+        return (time_start.strip(), time_end.strip(), "WORK", None)
+    if "MC" in string:
+        time_start, time_end = string.split("MC")
+        return (time_start.strip(), time_end.strip(), "WORK", "MC")
+    return (None, None, None, string)
+
+
+class LayoutTest(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(layouts._detected.clear)
+        layouts._detected.clear()
+
+    def workbook(self, rows: list[list]) -> BytesIO:
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+
+        buffer = BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        return buffer
+
+    def parse(self, file, layout=None) -> ScheduleParser:
+        schedule_parser = ScheduleParser()
+        schedule_parser.parse(file, layout=layout)
+
+        return schedule_parser
+
+    def test_generated_workbook_matches_previous_parser(self):
+        content, _ = generate_workbook(60, year=2024, month=2, seed=3)
+
+        sheet = load_workbook(BytesIO(content)).active
+        rows = list(sheet.iter_rows(values_only=True))
+        days = rows[2][2:]
+        expected = []
+        for row in rows[3:]:
+            if row[0] in SECTIONS:
+                continue
+
+            shifts = []
+            for day, cell in zip(days, row[2:]):
+                if cell is None:
+                    continue
+
+                parsed = _previous_cell_grammar(cell)
+                times = [
+                    datetime.time(*map(int, time.split(":"))) if time else None
+                    for time in parsed[:2]
+                ]
+                shifts.append(ParsedShift(datetime.date(2024, 2, day), *times, *parsed[2:]))
+
+            expected.append((*row[0].split(" "), shifts))
+
+        schedule_parser = self.parse(BytesIO(content))
+
+        self.assertIs(schedule_parser.layout, DEFAULT_LAYOUT)
+        self.assertEqual(
+            [
+                (employee.first_name, employee.last_name, employee.schedule.shifts)
+                for employee in schedule_parser.full_schedule
+            ],
+            expected,
+        )
+
+    def test_cell_grammar(self):
+        for cell, parsed in [
+            ("8:00-16:00", ("8:00", "16:00", "WORK", None)),
+            ("8 - 16", ("8", "16", "WORK", None)),
+            ("10:00MC18:00", ("10:00", "18:00", "WORK", "MC")),
+            ("8:00U16:00", ("8:00", "16:00", "VACATION", None)),
+            ("U", (None, None, "VACATION", None)),
+            (" OFF ", (None, None, "AVAILABILITY_OFF", None)),
+            ("W", (None, None, "NON_WORKING_DAY", None)),
+            ("L4", (None, None, None, "L4")),
+            ("URLOP", (None, None, None, "URLOP")),
+            ("8:00-", (None, None, None, "8:00-")),
+        ]:
+            self.assertEqual(DEFAULT_LAYOUT.parse_cell(cell), parsed, cell)
+
+    def test_detection_is_cached_per_template(self):
+        with mock.patch.object(LayoutProfile, "matches", autospec=True, return_value=True) as m:
+            for month in (1, 2, 9):
+                content, _ = generate_workbook(5, month=month)
+                self.parse(BytesIO(content))
+
+        # every month of the template has the same fingerprint, checked once per sheet
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual(len(layouts._detected), 1)
+
+    def test_sheet_without_section_markers(self):
+        file = self.workbook(
+            [
+                [datetime.datetime(2025, 6, 1)],
+                ["Imię i nazwisko", None, "nd", "pon"],
+                [None, "Etat", 1, 2],
+                ["Jan Kowalski", "FULL TIME", "8:00-16:00", "W"],
+                ["Anna Nowak", "FULL TIME", "OFF", "12:00-20:00"],
+            ]
+        )
+
+        schedule_parser = self.parse(file)
+
+        self.assertEqual(
+            [employee.last_name for employee in schedule_parser.full_schedule],
+            ["Kowalski", "Nowak"],
+        )
+        self.assertEqual(
+            schedule_parser.full_schedule[1].schedule.shifts[1],
+            ParsedShift(datetime.date(2025, 6, 2), datetime.time(12), datetime.time(20), "WORK"),
+        )
+
+    def test_unknown_layout(self):
+        file = self.workbook([["Grafik czerwiec"], [None, None, 1, 2], ["Jan Kowalski"]])
+
+        with self.assertRaises(UnknownLayout):
+            self.parse(file)
+
+        self.assertEqual(layouts._detected, {})
+
+    def test_unknown_layout_name(self):
+        content, _ = generate_workbook(5)
+
+        with self.assertRaises(UnknownLayout):
+            self.parse(BytesIO(content), layout="missing")
+
+    def test_given_layout_without_month(self):
+        file = self.workbook([["Grafik czerwiec"], [None, None, 1, 2], ["Jan Kowalski"]])
+
+        with self.assertRaisesMessage(UnknownLayout, "should be the month"):
+            self.parse(file, layout=DEFAULT_LAYOUT)
+
+    def test_layout_is_keyword_only(self):
+        content, _ = generate_workbook(5)
+
+        # callers of the old signature passed the names' column index here
+        with self.assertRaises(TypeError):
+            ScheduleParser().parse(BytesIO(content), 0)
+
+    def test_registered_layout(self):
+        self.addCleanup(layouts.LAYOUTS.pop, "names_second", None)
+        layouts.register_layout(
+            LayoutProfile(
+                name="names_second",
+                header_rows=2,
+                day_row=1,
+                name_column=1,
+                first_day_column=2,
+                section_markers=frozenset({"KASA"}),
+                cell_rules=(layouts.CellRule(r"L4", ShiftDayType.SICK_LEAVE),),
+            )
+        )
+        file = self.workbook(
+            [
+                [datetime.datetime(2025, 6, 1)],
+                [None, "Nazwisko", 1, 2],
+                [None, "KASA"],
+                [None, "Jan Kowalski", "L4", None],
+            ]
+        )
+
+        schedule_parser = self.parse(file)
+
+        self.assertEqual(schedule_parser.layout.name, "names_second")
+        self.assertEqual(
+            schedule_parser.full_schedule[0].schedule.shifts,
+            [ParsedShift(datetime.date(2025, 6, 1), None, None, ShiftDayType.SICK_LEAVE)],
+        )
+
+    def test_templates_differing_in_columns(self):
+        for name, name_column in [("names_first", 0), ("names_second", 1)]:
+            self.addCleanup(layouts.LAYOUTS.pop, name, None)
+            layouts.register_layout(
+                LayoutProfile(
+                    name=name, header_rows=2, day_row=1, name_column=name_column, first_day_column=2
+                )
+            )
+
+        # the same header texts, with the names and the contract types swapped
+        names_first = [["Nazwisko", "Etat", 1, 2], ["Jan Kowalski", "ETAT", "8-16", None]]
+        names_second = [["Etat", "Nazwisko", 1, 2], ["ETAT", "Jan Kowalski", "8-16", None]]
+        for rows, name in [
+            (names_first, "names_first"),
+            (names_second, "names_second"),
+            (names_first, "names_first"),
+        ]:
+            schedule_parser = self.parse(self.workbook([[datetime.datetime(2025, 6, 1)], *rows]))
+
+            self.assertEqual(schedule_parser.layout.name, name)
+            self.assertEqual(schedule_parser.full_schedule[0].last_name, "Kowalski")
+
+        self.assertEqual(len(layouts._detected), 2)
+
+
+class SyncCursorTest(SimpleTestCase):
+    def test_round_trip(self):
+        now = timezone.now()
+
+        self.assertEqual(decode_cursor(encode_cursor(now)), now)
+
+    def test_invalid_cursors(self):
+        for raw in [
+            b"1:yesterday",
+            b"2:2025-01-01T00:00:00+00:00",
+            # a naive time can't be compared with the aware ones in the database
+            b"1:2025-01-01T00:00:00",
+            b"\xff\xfe",
+        ]:
+            with self.assertRaises(InvalidCursor, msg=raw):
+                decode_cursor(base64.urlsafe_b64encode(raw).decode())
+
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not base64!")
+
+
+class SyncTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(email="sync@example.com")
+        self.schedule = EmployeeSchedule.objects.create(user=self.user, year=2025, month=5)
+        Shift.objects.bulk_create(
+            Shift(schedule=self.schedule, date=datetime.date(2025, 5, day)) for day in (1, 2, 3)
+        )
+        self.old = EmployeeSchedule.objects.create(user=self.user, year=2025, month=4)
+
+        # the cursor of a sync an hour ago, with nothing changed since
+        an_hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        EmployeeSchedule.objects.update(modified_at=an_hour_ago - datetime.timedelta(hours=1))
+        Shift.objects.update(modified_at=an_hour_ago - datetime.timedelta(hours=1))
+        self.since = decode_cursor(encode_cursor(an_hour_ago))
+
+    def test_full_sync_without_cursor(self):
+        changes = changes_since(self.user.pk, None)
+
+        self.assertTrue(changes["full"])
+        self.assertEqual(
+            [schedule["id"] for schedule in changes["schedules"]], [self.old.pk, self.schedule.pk]
+        )
+        self.assertEqual(len(changes["schedules"][1]["shifts"]), 3)
+
+    def test_nothing_changed(self):
+        changes = changes_since(self.user.pk, self.since)
+
+        self.assertFalse(changes["full"])
+        self.assertEqual(changes["schedules"], [])
+        self.assertEqual(changes["deleted"], {"schedules": [], "shifts": []})
+        self.assertGreater(decode_cursor(changes["cursor"]), self.since)
+
+    def test_changed_shift(self):
+        shift = Shift.objects.get(date=datetime.date(2025, 5, 2))
+        shift.day_type = ShiftDayType.VACATION
+        shift.save()
+
+        changes = changes_since(self.user.pk, self.since)
+
+        self.assertEqual([schedule["id"] for schedule in changes["schedules"]], [self.schedule.pk])
+        self.assertEqual(
+            [changed["id"] for changed in changes["schedules"][0]["shifts"]], [shift.pk]
+        )
+
+    def test_one_event_per_schedule_and_transaction(self):
+        with (
+            mock.patch("schedule_manager.events.get_backend") as get_backend,
+            self.captureOnCommitCallbacks(execute=True),
+            transaction.atomic(),
+        ):
+            for shift in Shift.objects.all():
+                shift.save()
+            Shift.objects.create(schedule=self.old, date=datetime.date(2025, 4, 1))
+
+        self.assertEqual(
+            sorted(call.args[1]["id"] for call in get_backend().publish.call_args_list),
+            [self.schedule.pk, self.old.pk],
+        )
+
+    def test_deleted_shifts_leave_tombstones(self):
+        deleted = list(Shift.objects.filter(date__day__lte=2).values_list("pk", flat=True))
+
+        Shift.objects.filter(pk__in=deleted).delete()
+
+        changes = changes_since(self.user.pk, self.since)
+        self.assertCountEqual(changes["deleted"]["shifts"], deleted)
+        self.assertEqual([schedule["id"] for schedule in changes["schedules"]], [self.schedule.pk])
+
+    def test_deleted_schedule_leaves_one_tombstone(self):
+        schedule_id = self.schedule.pk
+        self.schedule.delete()
+
+        changes = changes_since(self.user.pk, self.since)
+        # the shifts deleted with it are covered by the schedule's tombstone
+        self.assertEqual(changes["deleted"], {"schedules": [schedule_id], "shifts": []})
+
+    def test_archiving_is_not_a_deletion(self):
+        archive_schedule(self.schedule)
+
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertEqual(changes_since(self.user.pk, self.since)["schedules"], [])
+
+        changes = changes_since(self.user.pk, None)
+        self.assertEqual(
+            [schedule["id"] for schedule in changes["schedules"]], [self.old.pk, self.schedule.pk]
+        )
+        self.assertEqual(
+            [shift["date"] for shift in changes["schedules"][1]["shifts"]],
+            ["2025-05-01", "2025-05-02", "2025-05-03"],
+        )
+
+    def test_expired_cursor_means_full_sync(self):
+        since = timezone.now() - datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+
+        self.assertTrue(changes_since(self.user.pk, since)["full"])
+
+
+class ArchiveTest(TestCase):
+    fields = ("id", "date", "time_start", "time_end", "day_type", "additional_info")
+
+    def setUp(self):
+        user = get_user_model().objects.create(email="archive@example.com")
+        self.schedule = EmployeeSchedule.objects.create(user=user, year=2024, month=2)
+        rows = [
+            (datetime.time(8), datetime.time(16), ShiftDayType.WORK, None),
+            (datetime.time(22, 30), datetime.time(6, 15), ShiftDayType.WORK, "MC"),
+            (None, None, ShiftDayType.VACATION, None),
+            (None, None, ShiftDayType.SICK_LEAVE, "zwolnienie"),
+        ]
+        Shift.objects.bulk_create(
+            Shift(
+                schedule=self.schedule,
+                date=datetime.date(2024, 2, day),
+                **dict(zip(self.fields[2:], row)),
+            )
+            for day, row in zip((1, 2, 28, 29), rows)
+        )
+        self.shifts = self.values(Shift.objects.filter(schedule=self.schedule).order_by("date"))
+
+    def values(self, shifts) -> list[tuple]:
+        return [tuple(getattr(shift, name) for name in self.fields) for shift in shifts]
+
+    def test_pack_round_trip(self):
+        shifts = Shift.objects.filter(schedule=self.schedule).order_by("date")
+
+        unpacked = unpack_shifts(pack_shifts(shifts), self.schedule)
+
+        self.assertEqual(self.values(unpacked), self.shifts)
+        self.assertTrue(all(shift.schedule is self.schedule for shift in unpacked))
+
+    def test_archived_shifts_are_served_by_get_shifts(self):
+        self.assertEqual(archive_schedule(self.schedule), 4)
+
+        self.schedule.refresh_from_db()
+        self.assertTrue(self.schedule.archived)
+        self.assertFalse(Shift.objects.exists())
+        self.assertEqual(ShiftArchive.objects.get().shift_count, 4)
+        self.assertEqual(self.values(self.schedule.get_shifts()), self.shifts)
+
+    def test_restore_brings_back_the_same_rows(self):
+        archive_schedule(self.schedule)
+
+        self.assertEqual(restore_schedule(self.schedule), 4)
+
+        self.schedule.refresh_from_db()
+        self.assertFalse(self.schedule.archived)
+        self.assertFalse(ShiftArchive.objects.exists())
+        self.assertEqual(self.values(self.schedule.get_shifts().order_by("date")), self.shifts)
+
+
+class RemoveDuplicatesMigrationTest(TransactionTestCase):
+    before = [("schedule_manager", "0004_sync_tracking")]
+    after = [("schedule_manager", "0005_unique_schedules_and_shifts")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+
+        return executor.loader.project_state(targets).apps
+
+    def test_archived_and_live_duplicates(self):
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes())
+        apps = self.migrate(self.before)
+        EmployeeSchedule = apps.get_model("schedule_manager", "EmployeeSchedule")
+        Shift = apps.get_model("schedule_manager", "Shift")
+        ShiftArchive = apps.get_model("schedule_manager", "ShiftArchive")
+
+        user = apps.get_model(settings.AUTH_USER_MODEL).objects.create(email="dup@example.com")
+        # the oldest schedule of the month, archived
+        kept = EmployeeSchedule.objects.create(user=user, year=2024, month=2, archived=True)
+        archived = [
+            Shift.objects.create(
+                schedule=kept, date=datetime.date(2024, 2, day), day_type=ShiftDayType.WORK
+            )
+            for day in (1, 2)
+        ]
+        ShiftArchive.objects.create(schedule=kept, data=pack_shifts(archived), shift_count=2)
+        Shift.objects.filter(schedule=kept).delete()
+        # a live duplicate, with a later shift of the same day
+        duplicate = EmployeeSchedule.objects.create(user=user, year=2024, month=2)
+        for day in (2, 3):
+            Shift.objects.create(
+                schedule=duplicate, date=datetime.date(2024, 2, day), day_type=ShiftDayType.VACATION
+            )
+
+        apps = self.migrate(self.after)
+        EmployeeSchedule = apps.get_model("schedule_manager", "EmployeeSchedule")
+        Shift = apps.get_model("schedule_manager", "Shift")
+        ShiftArchive = apps.get_model("schedule_manager", "ShiftArchive")
+
+        schedule = EmployeeSchedule.objects.get()
+        self.assertEqual(schedule.pk, kept.pk)
+        self.assertFalse(schedule.archived)
+        self.assertFalse(ShiftArchive.objects.exists())
+        self.assertEqual(
+            list(Shift.objects.order_by("date").values_list("schedule", "date__day", "day_type")),
+            [
+                (kept.pk, 1, ShiftDayType.WORK),
+                (kept.pk, 2, ShiftDayType.VACATION),
+                (kept.pk, 3, ShiftDayType.VACATION),
+            ],
+        )
+
+
+class ValidateWorkbookTest(SimpleTestCase):
+    def upload(self, content: bytes, name: str = "schedule.xlsx") -> SimpleUploadedFile:
+        return SimpleUploadedFile(name, content)
+
+    def zipped(self, files: dict[str, bytes]) -> bytes:
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+
+        return buffer.getvalue()
+
+    def workbook_xml(self, sheets: int) -> bytes:
+        namespace = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+        entries = "".join(f'<sheet name="{index}" sheetId="{index}"/>' for index in range(sheets))
+
+        return f'<workbook xmlns="{namespace}"><sheets>{entries}</sheets></workbook>'.encode()
+
+    def test_generated_workbook_is_valid(self):
+        content, _ = generate_workbook(5)
+        file = self.upload(content)
+
+        validate_workbook(file)
+
+        # left at the start for the parser
+        self.assertEqual(file.tell(), 0)
+
+    def test_wrong_extension(self):
+        content, _ = generate_workbook(5)
+
+        with self.assertRaisesMessage(InvalidWorkbook, "expected an .xlsx file"):
+            validate_workbook(self.upload(content, "schedule.xls"))
+
+    def test_not_a_zip(self):
+        with self.assertRaisesMessage(InvalidWorkbook, "not an Excel workbook"):
+            validate_workbook(self.upload(b"Imie;Nazwisko\nJan;Kowalski\n"))
+
+    def test_zip_without_workbook(self):
+        with self.assertRaisesMessage(InvalidWorkbook, "not an Excel workbook"):
+            validate_workbook(self.upload(self.zipped({"notes.txt": b"hello"})))
+
+    @override_settings(SCHEDULE_UPLOAD_MAX_SHEETS=3)
+    def test_too_many_sheets(self):
+        content = self.zipped({"xl/workbook.xml": self.workbook_xml(4)})
+
+        with self.assertRaisesMessage(InvalidWorkbook, "has 4 sheets"):
+            validate_workbook(self.upload(content))
+
+        validate_workbook(self.upload(self.zipped({"xl/workbook.xml": self.workbook_xml(3)})))
+
+    @override_settings(SCHEDULE_UPLOAD_MAX_UNPACKED_SIZE=1_000_000)
+    def test_unpacks_too_large(self):
+        # compresses to a few kilobytes
+        content = self.zipped(
+            {"xl/workbook.xml": self.workbook_xml(1), "xl/sharedStrings.xml": b"0" * 2_000_000}
+        )
+
+        with self.assertRaisesMessage(InvalidWorkbook, "too large"):
+            validate_workbook(self.upload(content))
+
+
+@override_settings(SCHEDULE_UPLOAD_MAX_SIZE=10_000)
+class ScheduleUploadTest(TestCase):
+    url = f"/{settings.ADMIN_ENDPOINT}/schedule_manager/employeeschedule/upload-schedule/"
+
+    def setUp(self):
+        self.client.force_login(
+            get_user_model().objects.create_superuser(email="admin@example.com", password="x")
+        )
+
+    def test_oversized_upload_is_dropped(self):
+        content, _ = generate_workbook(100)
+        self.assertGreater(len(content), 10_000)
+
+        response = self.client.post(
+            self.url, {"schedule_file": SimpleUploadedFile("schedule.xlsx", content)}
+        )
+
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertIn("larger than", str(list(get_messages(response.wsgi_request))[0]))
+        self.assertFalse(EmployeeSchedule.objects.exists())
+
+    def test_invalid_upload_is_rejected(self):
+        response = self.client.post(
+            self.url, {"schedule_file": SimpleUploadedFile("schedule.xlsx", b"not a zip")}
+        )
+
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertIn("not an Excel workbook", str(list(get_messages(response.wsgi_request))[0]))
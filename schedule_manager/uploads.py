@@ -0,0 +1,105 @@
+import os
+import zipfile
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+
+ZIP_SIGNATURE = b"PK\x03\x04"
+
+SPREADSHEET_NAMESPACE = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+class InvalidWorkbook(ValueError):
+    pass
+
+
+class CappedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Streams every uploaded file into a temporary file on disk.
+
+    Uploads are never buffered in memory, so a workbook is held in RAM only once, by the
+    parser. Files larger than SCHEDULE_UPLOAD_MAX_SIZE are dropped while they are being
+    received and their field name is added to `request.oversized_uploads`.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+
+        if self.received > settings.SCHEDULE_UPLOAD_MAX_SIZE:
+            oversized = getattr(self.request, "oversized_uploads", [])
+            self.request.oversized_uploads = [*oversized, self.field_name]
+            # the multipart parser closes, and so deletes, the temporary file
+            raise SkipFile()
+
+        return super().receive_data_chunk(raw_data, start)
+
+
+def validate_workbook(file: UploadedFile) -> None:
+    """Checks that an upload looks like a schedule workbook, without parsing it.
+
+    Only the zip directory and the small xl/workbook.xml part are read.
+
+    Args:
+        file (UploadedFile): Uploaded file.
+
+    Raises:
+        InvalidWorkbook: If the file isn't an .xlsx workbook, would unpack into more than
+            SCHEDULE_UPLOAD_MAX_UNPACKED_SIZE bytes or doesn't have between 1 and
+            SCHEDULE_UPLOAD_MAX_SHEETS sheets.
+    """
+
+    if not file.name.lower().endswith(".xlsx"):
+        raise InvalidWorkbook("Wrong file type was uploaded, expected an .xlsx file.")
+
+    file.seek(0)
+    if file.read(len(ZIP_SIGNATURE)) != ZIP_SIGNATURE:
+        raise InvalidWorkbook("The file is not an Excel workbook.")
+
+    file.seek(0)
+    try:
+        with zipfile.ZipFile(file) as workbook:
+            unpacked_size = sum(member.file_size for member in workbook.infolist())
+            if unpacked_size > settings.SCHEDULE_UPLOAD_MAX_UNPACKED_SIZE:
+                raise InvalidWorkbook("The workbook is too large.")
+
+            with workbook.open("xl/workbook.xml") as workbook_xml:
+                sheets = sum(
+                    element.tag == f"{SPREADSHEET_NAMESPACE}sheet"
+                    for _, element in ElementTree.iterparse(workbook_xml)
+                )
+
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        raise InvalidWorkbook("The file is not an Excel workbook.")
+
+    finally:
+        file.seek(0)
+
+    if not 1 <= sheets <= settings.SCHEDULE_UPLOAD_MAX_SHEETS:
+        raise InvalidWorkbook(
+            f"The workbook has {sheets} sheets, at most "
+            f"{settings.SCHEDULE_UPLOAD_MAX_SHEETS} are expected."
+        )
+
+
+def parser_source(file: UploadedFile) -> str | UploadedFile:
+    """Returns what to pass to `ScheduleParser.parse` for an upload, without copying it.
+
+    Args:
+        file (UploadedFile): Uploaded file.
+
+    Returns:
+        str | UploadedFile: Path of the temporary file the upload was spooled to, or the
+            upload itself when it was kept in memory by another upload handler.
+    """
+
+    if hasattr(file, "temporary_file_path") and os.path.exists(file.temporary_file_path()):
+        return file.temporary_file_path()
+
+    file.seek(0)
+    return file
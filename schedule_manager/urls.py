@@ -1,6 +1,18 @@
 from django.urls import path
-from .views import EmployeeScheduleView
+from .views import (
+    EmployeeScheduleView,
+    CoverageView,
+    AvailabilityView,
+    SyncView,
+    BootstrapView,
+    schedule_events,
+)
 
 urlpatterns = [
     path("schedule/", EmployeeScheduleView.as_view(), name="employee_schedule"),
+    path("bootstrap/", BootstrapView.as_view(), name="bootstrap"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("events/", schedule_events, name="schedule_events"),
+    path("coverage/", CoverageView.as_view(), name="coverage"),
+    path("availability/", AvailabilityView.as_view(), name="availability"),
 ]
@@ -1,11 +1,39 @@
+import datetime
+import json
+import time
+from dataclasses import asdict
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from schedule_app.throttling import ScheduleRateThrottle
 from .serializers import ShiftSerializer
-from .models import Shift, EmployeeSchedule
+from .models import EmployeeSchedule
+from .coverage import coverage_for_range, MAX_COVERAGE_DAYS
+from .availability import find_available, ArchivedMonth, MAX_AVAILABILITY_DAYS
+from .sync import changes_since, decode_cursor, InvalidCursor
+from .events import get_backend
 
 
-class EmployeeScheduleView(APIView):
+class ScheduleReadView(APIView):
+    """Base of the employee facing read endpoints."""
+
+    throttle_classes = (ScheduleRateThrottle,)
+
+    def perform_authentication(self, request):
+        # authenticate on first access to request.auth, after the throttles ran,
+        # so throttled requests don't look the user up
+        pass
+
+
+class EmployeeScheduleView(ScheduleReadView):
     serializer = ShiftSerializer
 
     def get(self, request):
@@ -43,7 +71,229 @@ class EmployeeScheduleView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        shifts = Shift.objects.filter(schedule=schedule)
-        data = [ShiftSerializer(shift).data for shift in shifts]
+        data = [ShiftSerializer(shift).data for shift in schedule.get_shifts()]
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SyncView(ScheduleReadView):
+    """Schedules and shifts of the user changed since the cursor of the previous sync."""
+
+    def get(self, request):
+
+        token = request.auth
+
+        if not token:
+            return Response(
+                {"Unauthorized": "You have to log in to see this data"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        since = None
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            try:
+                since = decode_cursor(cursor)
+
+            except InvalidCursor:
+                return Response(
+                    {"Bad Request": "invalid cursor, sync without one to start over"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        return Response(changes_since(token["user_id"], since), status=status.HTTP_200_OK)
+
+
+class BootstrapView(ScheduleReadView):
+    """Everything the app needs right after logging in.
+
+    Returns the profile from the token claims and the schedules of the current and the
+    next month, both read in a single query. Months that weren't published yet are left
+    out, like the 404 of the schedule endpoint.
+    """
+
+    def get(self, request):
+
+        token = request.auth
+
+        if not token:
+            return Response(
+                {"Unauthorized": "You have to log in to see this data"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        today = timezone.localdate()
+        next_month = (today.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+        fields = ShiftSerializer.Meta.fields
+        # LEFT JOIN of the shifts, a schedule without any still comes back as one row
+        rows = (
+            EmployeeSchedule.objects.filter(
+                Q(month=today.month, year=today.year)
+                | Q(month=next_month.month, year=next_month.year),
+                user=token["user_id"],
+            )
+            .order_by("year", "month", "shift__date")
+            .values_list("id", "month", "year", *(f"shift__{field}" for field in fields))
+        )
+
+        serializer = ShiftSerializer()
+        schedules = {}
+        for schedule_id, month, year, *shift in rows:
+            schedule = schedules.setdefault(
+                schedule_id, {"id": schedule_id, "month": month, "year": year, "shifts": []}
+            )
+            if shift[0] is not None:
+                schedule["shifts"].append(serializer.to_representation(dict(zip(fields, shift))))
+
+        data = {
+            "profile": {
+                "id": token["user_id"],
+                "email": token.get("email"),
+                "first_name": token.get("first_name"),
+                "last_name": token.get("last_name"),
+            },
+            "schedules": list(schedules.values()),
+        }
 
         return Response(data, status=status.HTTP_200_OK)
+
+
+class CoverageView(APIView):
+    """Number of employees at work in every 15-minute slot of a date range."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+
+        try:
+            start = datetime.date.fromisoformat(request.query_params["start"])
+            end = datetime.date.fromisoformat(request.query_params["end"])
+
+        except (KeyError, ValueError):
+            return Response(
+                {"Bad Request": "start and end parameters in YYYY-MM-DD format are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not 0 <= (end - start).days < MAX_COVERAGE_DAYS:
+            return Response(
+                {"Bad Request": f"end has to be within {MAX_COVERAGE_DAYS} days after start"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(coverage_for_range(start, end).to_dict(), status=status.HTTP_200_OK)
+
+
+class AvailabilityView(APIView):
+    """Employees free in a time window on a day, or on each of the following days."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+
+        try:
+            day = datetime.date.fromisoformat(request.query_params["date"])
+            start = datetime.time.fromisoformat(request.query_params["start"])
+            end = datetime.time.fromisoformat(request.query_params["end"])
+            days = int(request.query_params.get("days", 1))
+
+        except (KeyError, ValueError):
+            return Response(
+                {
+                    "Bad Request": "date parameter in YYYY-MM-DD format and start and end "
+                    "parameters in HH:MM format are required"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if end <= start:
+            return Response(
+                {"Bad Request": "end has to be after start"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not 1 <= days <= MAX_AVAILABILITY_DAYS:
+            return Response(
+                {"Bad Request": f"days has to be between 1 and {MAX_AVAILABILITY_DAYS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            employees = find_available(day, start, end, days)
+
+        except ArchivedMonth as error:
+            return Response({"Bad Request": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "date": day,
+                "start": start.strftime("%H:%M"),
+                "end": end.strftime("%H:%M"),
+                "days": days,
+                "employees": [asdict(employee) for employee in employees],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+async def _event_stream(user_id: int, expires_at: int):
+    subscription = await get_backend().subscribe(user_id)
+
+    try:
+        yield "retry: 5000\n\n"
+
+        while (remaining := expires_at - time.time()) > 0:
+            events = await subscription.get(min(settings.EVENTS_HEARTBEAT_SECONDS, remaining))
+
+            if not events:
+                yield ": heartbeat\n\n"
+
+            for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+        yield "event: expired\ndata: {}\n\n"
+
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def schedule_events(request):
+    """Server-sent events telling the user that one of their schedules changed.
+
+    EventSource can't send headers, so the access token can also be passed in the `token`
+    query parameter. The stream ends when the token expires, the client then reconnects
+    with a fresh one and catches up through the sync endpoint. Waiting connections don't
+    use the database or a thread.
+    """
+
+    authorization = request.headers.get("Authorization", "")
+    raw_token = (
+        authorization.removeprefix("Bearer ").strip()
+        if authorization.startswith("Bearer ")
+        else request.GET.get("token")
+    )
+
+    try:
+        # AccessToken(None) would create a new token
+        token = AccessToken(raw_token) if raw_token else None
+        user_id = token["user_id"] if token else None
+
+    except (TokenError, KeyError):
+        user_id = None
+
+    if user_id is None:
+        return JsonResponse(
+            {"Unauthorized": "You have to log in to see this data"},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    response = StreamingHttpResponse(
+        _event_stream(user_id, token["exp"]), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx would buffer the stream otherwise
+    response["X-Accel-Buffering"] = "no"
+
+    return response